@@ -0,0 +1,349 @@
+import hashlib
+import html
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+GENRES = [
+    "doom metal", "stoner rock", "sludge metal", "post-metal", "black metal", "drone",
+    "psychedelic rock", "shoegaze", "post-rock", "noise rock", "crust punk", "dark folk",
+]
+COUNTRIES = ["swedish", "dutch", "german", "american", "british", ""]
+
+
+def spotify_id(*parts):
+    """Stable 22 character base62-compatible ID."""
+    return hashlib.sha1("/".join(str(part) for part in parts).encode()).hexdigest()[:22]
+
+
+def pick(seed, items, count=1):
+    rng = random.Random(str(seed))
+    return rng.sample(items, count)
+
+
+class FakeSpotify:
+    """
+    In-memory stand-in for the parts of the Spotify Web API used by the scripts.
+
+    Artists exist for every searched name; a name is ambiguous (two exact matches)
+    for ambiguous_rate of all names, and searches report total_results hits so the
+    scripts page through results like they would for common names.
+    """
+
+    def __init__(self, ambiguous_rate=0.1, total_results=120, seed=0):
+        self.ambiguous_rate = ambiguous_rate
+        self.total_results = total_results
+        self.seed = seed
+        self.playlists = {}
+        self.artists = {}
+        self.albums = {}
+        self.tracks = {}
+        self.base_url = ''
+        self.lock = threading.RLock()
+
+    def artist(self, name, variant=0):
+        artist_id = spotify_id(self.seed, 'artist', name.lower(), variant)
+        if artist_id not in self.artists:
+            country = pick((artist_id, 'country'), COUNTRIES)[0]
+            genres = [f"{country} {genre}".strip() for genre in pick((artist_id, 'genres'), GENRES, 2)]
+            self.artists[artist_id] = {
+                'id': artist_id,
+                'name': name,
+                'genres': genres,
+                'popularity': random.Random(artist_id).randint(5, 70),
+                'type': 'artist',
+                'uri': f'spotify:artist:{artist_id}',
+            }
+        return self.artists[artist_id]
+
+    def is_ambiguous(self, name):
+        return random.Random(spotify_id(self.seed, 'ambiguous', name.lower())).random() < self.ambiguous_rate
+
+    def search_artists(self, query, limit, offset):
+        name = re.sub(r'^artist:"(.*)"$', r'\1', query)
+        exact = [self.artist(name)] + ([self.artist(name, 1)] if self.is_ambiguous(name) else [])
+        # Exact matches are spread over the first and a later page, like real results for common names
+        results = exact[:1] + [self.artist(f"{name} {n}") for n in range(1, self.total_results - len(exact) + 1)]
+        if len(exact) > 1:
+            results.insert(min(len(results), 60), exact[1])
+        return {'artists': self.paging(results[offset:offset + limit], 'search', offset, limit, len(results))}
+
+    def top_tracks(self, artist_id):
+        return {'tracks': [self.track(artist_id, n) for n in range(10)]}
+
+    def track(self, artist_id, n):
+        track_id = spotify_id(self.seed, 'track', artist_id, n)
+        artist = self.artists.get(artist_id, {'id': artist_id, 'name': artist_id})
+        track = {'id': track_id, 'uri': f'spotify:track:{track_id}', 'name': f"Track {n}", 'artists': [{'id': artist['id'], 'name': artist['name']}]}
+        self.tracks[track['uri']] = track
+        return track
+
+    def album(self, album_id, name=None, artist_name=None):
+        if album_id not in self.albums:
+            artist = self.artist(artist_name or f"Album Artist {album_id[:6]}")
+            rng = random.Random(album_id)
+            # Some albums are longer than one page of album tracks, like deluxe editions
+            track_count = rng.randint(60, 120) if rng.random() < 0.1 else rng.randint(4, 12)
+            self.albums[album_id] = {
+                'id': album_id,
+                'name': name or f"Album {album_id[:6]}",
+                'artists': [{'id': artist['id'], 'name': artist['name']}],
+                'track_ids': [self.track(album_id, n)['uri'] for n in range(track_count)],
+            }
+        return self.albums[album_id]
+
+    def album_object(self, album_id, offset=0, limit=50):
+        album = self.album(album_id)
+        tracks = [{'uri': uri, 'id': uri.split(':')[-1]} for uri in album['track_ids']]
+        return {
+            'id': album['id'], 'name': album['name'], 'artists': album['artists'],
+            'tracks': self.paging(tracks[offset:offset + limit], f'albums/{album_id}/tracks', offset, limit, len(tracks)),
+        }
+
+    def search_albums(self, query):
+        fields = dict(re.findall(r'(album|artist):(.*?)(?= album:| artist:|$)', query))
+        album_id = spotify_id(self.seed, 'album', query.lower())
+        self.album(album_id, fields.get('album'), fields.get('artist'))
+        return {'albums': self.paging([{'id': album_id, 'name': self.albums[album_id]['name']}], 'search', 0, 1, 1)}
+
+    def paging(self, items, path, offset, limit, total):
+        following = offset + limit
+        return {
+            'items': items,
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'next': f"{self.base_url}{path}?offset={following}&limit={limit}" if following < total else None,
+        }
+
+    def snapshot(self, playlist):
+        playlist['version'] += 1
+        return spotify_id(playlist['id'], playlist['version'])
+
+    def playlist_page(self, playlist_id, offset, limit):
+        playlist = self.playlists[playlist_id]
+        items = [{'track': self.track_by_uri(uri)} for uri in playlist['uris'][offset:offset + limit]]
+        return self.paging(items, f'playlists/{playlist_id}/items', offset, limit, len(playlist['uris']))
+
+    def track_by_uri(self, uri):
+        return self.tracks.get(uri, {'id': uri.split(':')[-1], 'uri': uri, 'artists': []})
+
+
+class FakeSpotifyServer:
+    """
+    Local HTTP server exposing FakeSpotify under /v1/ and synthetic review pages under /pages/.
+
+    Every request waits latency seconds (plus up to jitter) and is answered with a 429
+    and a Retry-After header with probability rate_limit_probability. Created playlists and
+    tracks added to a playlist are answered with a 502 after they were created or added with
+    probability lost_write_probability, like a response lost on the way back.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit_probability=0.0, retry_after=1, lost_write_probability=0.0, **backend_options):
+        self.backend = FakeSpotify(**backend_options)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_probability = rate_limit_probability
+        self.retry_after = retry_after
+        self.lost_write_probability = lost_write_probability
+        self.lost_writes = Counter()
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self.bytes_sent = 0
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self.handler_class())
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}/"
+        self.api_prefix = self.base_url + "v1/"
+        self.backend.base_url = self.api_prefix
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_stats(self):
+        self.calls.clear()
+        self.rate_limited.clear()
+        self.lost_writes.clear()
+        self.bytes_sent = 0
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately, avoid delayed ACK stalls on keep-alive connections
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server.handle(self, 'GET')
+
+            def do_POST(self):
+                server.handle(self, 'POST')
+
+            def do_PUT(self):
+                server.handle(self, 'PUT')
+
+            def do_DELETE(self):
+                server.handle(self, 'DELETE')
+
+        return Handler
+
+    def endpoint(self, method, path):
+        """Group paths by endpoint, e.g. 'GET /v1/artists/{id}/top-tracks'."""
+        if path.startswith('/pages/'):
+            return f"{method} /pages/{path.split('/')[2]}"
+        path = re.sub(r'/[0-9a-f]{22}', '/{id}', path.rstrip('/'))
+        path = re.sub(r'/users/[^/]+/', '/users/{id}/', path)
+        return f"{method} {path}"
+
+    def handle(self, request, method):
+        url = urlparse(request.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path
+        length = int(request.headers.get('Content-Length') or 0)
+        body = json.loads(request.rfile.read(length) or 'null') if length else None
+
+        endpoint = self.endpoint(method, path)
+        with self.backend.lock:
+            self.calls[endpoint] += 1
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.random() * self.jitter)
+        if random.random() < self.rate_limit_probability:
+            with self.backend.lock:
+                self.rate_limited[endpoint] += 1
+            return self.respond(request, 429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}}, {'Retry-After': str(self.retry_after)})
+
+        try:
+            with self.backend.lock:
+                if path.startswith('/pages/'):
+                    return self.respond_html(request, self.page(path), request.headers.get('If-None-Match'))
+                status, result = self.route(method, path.rstrip('/'), query, body)
+        except KeyError:
+            status, result = 404, {'error': {'status': 404, 'message': 'Not found'}}
+        if status == 201 and random.random() < self.lost_write_probability:
+            with self.backend.lock:
+                self.lost_writes[endpoint] += 1
+            status, result = 502, {'error': {'status': 502, 'message': 'Bad gateway'}}
+        self.respond(request, status, result)
+
+    def route(self, method, path, query, body):
+        backend = self.backend
+        limit = int(query.get('limit', 20))
+        offset = int(query.get('offset', 0))
+        parts = path.split('/')[2:]
+
+        if parts == ['me']:
+            return 200, {'id': 'benchmark', 'display_name': 'Benchmark'}
+        if parts == ['me', 'playlists']:
+            playlists = [{'id': playlist['id'], 'name': playlist['name']} for playlist in backend.playlists.values()]
+            return 200, backend.paging(playlists[offset:offset + limit], 'me/playlists', offset, limit, len(playlists))
+        if parts[0] == 'users' and parts[2:] == ['playlists'] and method == 'POST':
+            playlist_id = spotify_id('playlist', body['name'], len(backend.playlists))
+            backend.playlists[playlist_id] = {'id': playlist_id, 'name': body['name'], 'uris': [], 'version': 0}
+            return 201, {'id': playlist_id, 'name': body['name'], 'snapshot_id': backend.snapshot(backend.playlists[playlist_id])}
+        if parts == ['search']:
+            if query.get('type') == 'album':
+                return 200, backend.search_albums(query['q'])
+            return 200, backend.search_artists(query['q'], limit, offset)
+        if parts[0] == 'artists' and parts[2:] == ['top-tracks']:
+            backend.artists.setdefault(parts[1], {'id': parts[1], 'name': parts[1], 'genres': [], 'popularity': 0})
+            return 200, backend.top_tracks(parts[1])
+        if parts[0] == 'artists' and len(parts) == 2:
+            return 200, backend.artists[parts[1]]
+        if parts == ['albums']:
+            return 200, {'albums': [backend.album_object(album_id) for album_id in query['ids'].split(',')]}
+        if parts[0] == 'albums' and len(parts) == 2:
+            return 200, backend.album_object(parts[1])
+        if parts[0] == 'albums' and parts[2:] == ['tracks']:
+            return 200, backend.album_object(parts[1], offset, limit)['tracks']
+        if parts[0] == 'playlists':
+            return self.route_playlist(method, parts, query, body, limit, offset)
+        raise KeyError(path)
+
+    def route_playlist(self, method, parts, query, body, limit, offset):
+        backend = self.backend
+        playlist = backend.playlists[parts[1]]
+        if len(parts) == 2:
+            if method == 'PUT':
+                return 200, {}
+            return 200, {'id': playlist['id'], 'name': playlist['name'], 'snapshot_id': spotify_id(playlist['id'], playlist['version']),
+                         'tracks': backend.playlist_page(playlist['id'], 0, 100)}
+        if parts[2] not in ('items', 'tracks'):
+            raise KeyError(parts)
+        uris = playlist['uris']
+        if method == 'GET':
+            return 200, backend.playlist_page(playlist['id'], offset, limit)
+        if method == 'POST':
+            position = int(query['position']) if 'position' in query else len(uris)
+            uris[position:position] = body
+        elif method == 'PUT' and 'uris' in body:
+            playlist['uris'] = list(body['uris'])
+        elif method == 'PUT':
+            start, length, before = body['range_start'], body.get('range_length', 1), body['insert_before']
+            moved = uris[start:start + length]
+            remaining = uris[:start] + uris[start + length:]
+            before -= length if before > start else 0
+            playlist['uris'] = remaining[:before] + moved + remaining[before:]
+        elif method == 'DELETE':
+            removed_positions = {position for item in body['items'] for position in item.get('positions', [])}
+            removed_uris = {item['uri'] for item in body['items'] if 'positions' not in item}
+            playlist['uris'] = [uri for position, uri in enumerate(uris) if position not in removed_positions and uri not in removed_uris]
+        return 200 if method != 'POST' else 201, {'snapshot_id': backend.snapshot(playlist)}
+
+    def page(self, path):
+        """Synthetic review pages in the markup of the sites the album scraper supports."""
+        parts = path.split('/')
+        site, key = parts[2], parts[-1]
+        count = int(re.sub(r'\D', '', key) or 10)
+        if site == 'theobelisk':
+            entries = "".join(f"<h3>{n}. Band {key} {n}, <em>Record {n}</em></h3><p>Review text {n}.</p>" for n in range(1, count + 1))
+            return f"<html><head><title>The Obelisk Review {key}</title></head><body><div class='entrytext'>{entries}</div></body></html>"
+        if site == 'thedevilsmouth':
+            frames = []
+            for n in range(1, count + 1):
+                if n % 3:
+                    frames.append(f"<iframe src='{self.base_url}pages/bandcamp.com/EmbeddedPlayer/{key}-{n}'></iframe>")
+                else:
+                    frames.append(f"<iframe src='{self.base_url}pages/open.spotify.com/embed/album/{spotify_id(key, n)}'></iframe>")
+            return f"<html><head><title>The Devils Mouth {key}</title></head><body>{''.join(frames)}</body></html>"
+        if site == 'bandcamp.com':
+            data = html.escape(json.dumps({'artist': f"Band {key}", 'album_title': f"Record {key}"}), quote=True)
+            padding = "<div class='filler'>" + "lorem ipsum " * 2000 + "</div>"
+            return f"<html><head><title>Bandcamp</title><script data-player-data=\"{data}\"></script></head><body>{padding}</body></html>"
+        if site == 'open.spotify.com':
+            return "<html><head><title>Spotify Embed</title></head><body><div id='root'></div></body></html>"
+        raise KeyError(path)
+
+    def respond_html(self, request, text, if_none_match=None):
+        # Pages are deterministic, so a content hash works as ETag for conditional requests
+        etag = f'"{hashlib.sha1(text.encode()).hexdigest()}"'
+        if if_none_match == etag:
+            return self.write(request, 304, b'', {'ETag': etag})
+        self.write(request, 200, text.encode(), {'Content-Type': 'text/html; charset=utf-8', 'ETag': etag})
+
+    def respond(self, request, status, result, headers=None):
+        self.write(request, status, json.dumps(result).encode(), dict(headers or {}, **{'Content-Type': 'application/json'}))
+
+    def write(self, request, status, payload, headers):
+        request.send_response(status)
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.send_header('Content-Length', str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+        with self.backend.lock:
+            self.bytes_sent += len(payload)
@@ -0,0 +1,50 @@
+import argparse
+import json
+import random
+
+SYLLABLES = ["mo", "no", "lith", "dra", "gon", "ash", "vul", "tur", "sun", "crypt", "ele", "phant", "tree", "rez", "sum", "ac", "thou", "gnod", "kha", "lur", "ch"]
+DECORATIONS = [" (Live)", " feat. Guest Band", ""]
+
+
+def artist_name(rng):
+    words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))).capitalize() for _ in range(rng.randint(1, 2))]
+    name = ' '.join(words)
+    # Festival lineups occasionally decorate names
+    if rng.random() < 0.05:
+        name += rng.choice(DECORATIONS)
+    return name
+
+
+def generate_list(artists, playlists=1, overlap=0.2, seed=0):
+    """
+    Generate a list file with the given number of artists spread over the playlists.
+
+    overlap is the share of artists of each playlist that are also listed in another one.
+    """
+    rng = random.Random(seed)
+    names = []
+    seen = set()
+    while len(names) < artists:
+        name = artist_name(rng)
+        if name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    per_playlist = max(1, artists // playlists)
+    result = {"playlists": []}
+    for n in range(playlists):
+        own = names[n * per_playlist:(n + 1) * per_playlist]
+        shared = rng.sample(names, min(len(names), int(len(own) * overlap)))
+        result["playlists"].append({"playlistName": f"Benchmark Playlist {n + 1}", "artists": own + shared})
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic artist list files for the benchmark.")
+    parser.add_argument('--artists', type=int, default=300)
+    parser.add_argument('--playlists', type=int, default=1)
+    parser.add_argument('--overlap', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True, help="Path of the list file to write")
+    args = parser.parse_args()
+    with open(args.out, "w") as file:
+        json.dump(generate_list(args.artists, args.playlists, args.overlap, args.seed), file, indent=4)
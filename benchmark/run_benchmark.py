@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_spotify import FakeSpotifyServer
+from generate_lists import generate_list
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = {
+    'by_artist': os.path.join(REPO_DIR, 'by_artist.py'),
+    'by_artist_and_album': os.path.join(REPO_DIR, 'by_artist_and_album.py'),
+}
+
+
+def run_script(script, work_dir, server, script_args=(), stdin=None):
+    """Run one script against the fake backend and return wall time, peak memory and its exit code."""
+    env = dict(os.environ, SPOTIFY_ACCESS_TOKEN='benchmark', SPOTIFY_API_PREFIX=server.api_prefix)
+    os.makedirs(os.path.join(work_dir, 'logs'), exist_ok=True)
+    with open(os.path.join(work_dir, 'output.log'), 'ab') as output:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, SCRIPTS[script], *script_args], cwd=work_dir, env=env,
+                                   stdin=subprocess.PIPE, stdout=output, stderr=subprocess.STDOUT)
+        if stdin is not None:
+            process.stdin.write(stdin.encode())
+        process.stdin.close()
+        # wait4 reports the resource usage of exactly this child
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        wall_time = time.perf_counter() - start
+    return wall_time, usage.ru_maxrss / 1024, process.returncode
+
+
+def benchmark(script, size, args):
+    server = FakeSpotifyServer(latency=args.latency, jitter=args.jitter, rate_limit_probability=args.rate_limit,
+                               retry_after=args.retry_after, lost_write_probability=args.lost_writes, ambiguous_rate=args.ambiguous_rate).start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix='playlist-benchmark-') as work_dir:
+            if script == 'by_artist':
+                list_path = os.path.join(work_dir, 'benchmark.json')
+                with open(list_path, 'w') as file:
+                    json.dump(generate_list(size, args.playlists, args.overlap, args.seed), file)
+                script_args, stdin = ['--list', list_path], None
+            else:
+                url = f"{server.base_url}pages/{args.site}/page-{size}"
+                script_args, stdin = [], f"url\n{url}\nBenchmark {args.site} {size}\n"
+
+            # The first run starts with empty caches, later runs show the warm path
+            for run in range(args.runs):
+                server.reset_stats()
+                wall_time, peak_memory, returncode = run_script(script, work_dir, server, script_args, stdin)
+                results.append({
+                    'script': script,
+                    'size': size,
+                    'run': run + 1,
+                    'wall_time': round(wall_time, 3),
+                    'peak_memory_mb': round(peak_memory, 1),
+                    'api_calls': sum(server.calls.values()),
+                    'rate_limited': sum(server.rate_limited.values()),
+                    'lost_writes': sum(server.lost_writes.values()),
+                    'bytes_sent': server.bytes_sent,
+                    'calls_per_endpoint': dict(sorted(server.calls.items())),
+                    'returncode': returncode,
+                })
+                if returncode:
+                    with open(os.path.join(work_dir, 'output.log')) as output:
+                        print(output.read()[-3000:], file=sys.stderr)
+    finally:
+        server.stop()
+    return results
+
+
+def print_report(results):
+    print(f"{'script':<22}{'size':>6}{'run':>5}{'wall s':>10}{'peak MB':>10}{'calls':>8}{'429s':>6}{'lost':>6}")
+    for result in results:
+        print(f"{result['script']:<22}{result['size']:>6}{result['run']:>5}{result['wall_time']:>10.2f}"
+              f"{result['peak_memory_mb']:>10.1f}{result['api_calls']:>8}{result['rate_limited']:>6}{result['lost_writes']:>6}"
+              + ("  FAILED" if result['returncode'] else ""))
+        for endpoint, count in result['calls_per_endpoint'].items():
+            print(f"    {endpoint:<50}{count:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the playlist scripts offline against a local fake Spotify backend.")
+    parser.add_argument('--script', choices=sorted(SCRIPTS), default='by_artist')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 300],
+                        help="Artists per list (by_artist) or embedded albums per page (by_artist_and_album)")
+    parser.add_argument('--playlists', type=int, default=1)
+    parser.add_argument('--overlap', type=float, default=0.2, help="Share of artists listed in more than one playlist")
+    parser.add_argument('--site', choices=['theobelisk', 'thedevilsmouth'], default='thedevilsmouth')
+    parser.add_argument('--runs', type=int, default=2, help="Runs per size on the same working directory (cold, then warm)")
+    parser.add_argument('--latency', type=float, default=0.02, help="Seconds added to every request")
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="Probability of answering a request with 429")
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--lost-writes', type=float, default=0.0, help="Probability of answering a created playlist or an added batch of tracks with a 502 after applying it")
+    parser.add_argument('--ambiguous-rate', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = [result for size in args.sizes for result in benchmark(args.script, size, args)]
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=4)
+    sys.exit(1 if any(result['returncode'] for result in results) else 0)
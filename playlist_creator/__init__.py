@@ -0,0 +1,13 @@
+"""
+Create and update Spotify playlists from artist lists and album reviews.
+
+Importing the package makes no requests and loads no heavy dependencies; a SpotifyContext
+creates its client on first use and can be shared by any number of updater runs.
+"""
+
+from .albums import AlbumPlaylistUpdater
+from .artists import ArtistPlaylistUpdater
+from .context import SpotifyContext
+from .settings import AlbumSettings, ArtistSettings
+
+__all__ = ['AlbumPlaylistUpdater', 'ArtistPlaylistUpdater', 'SpotifyContext', 'AlbumSettings', 'ArtistSettings']
@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import re
+from datetime import datetime
+
+from .metrics import host_endpoint
+from .playlist_index import UserPlaylistIndex
+from .settings import AlbumSettings
+
+# Created originally for scraping theobelisk reviews and creating spotify playlists
+
+
+# Read artist and album from an embedded bandcamp player
+def scrape_track(document, dict):
+    # The player data is a single attribute, scan for it instead of parsing the whole page
+    data_player_data = next(iter(document.attribute_values('script', 'data-player-data')), None)
+    if data_player_data:
+        try:
+            # Parse JSON content
+            data = json.loads(data_player_data)
+            artist = data.get('artist', None)
+            album = data.get('album_title', None)
+            if artist not in dict:
+                dict[f"{artist}"] = album
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON: {e}")
+    else:
+        print("No 'data-player-data' script tag found.")
+
+    return dict
+
+
+# Spotify embeds carry the album ID in the URL, so they are never fetched
+def embedded_album_id(url):
+    if "album/" in url:
+        return url.split("album/")[1].split("?")[0]
+    return None
+
+
+# Get artist and album information from an album fetched by get_albums
+def get_album_and_artist(album_data, dict):
+    artist = album_data['artists'][0]['name']
+    album = album_data['name']
+    dict[f"{artist}"] = album
+
+    return dict
+
+
+def scrape_iframes(document):
+    """
+    Scrape links from iframe tags on a given webpage.
+
+    Args:
+        document (Document): The fetched webpage to scrape.
+
+    Returns:
+        list: A list of bandcamp and spotify links found in iframe tags.
+    """
+    return [src for src in document.attribute_values('iframe', 'src') if 'bandcamp.com' in src or 'open.spotify.com' in src]
+
+
+def scrape_theobelisk(document):
+    dict = {}
+    # Only the review body is parsed, the rest of the page is skipped by the strainer
+    entrytext = document.soup(class_=re.compile(r"\bentrytext\b"))
+    for heading in ('h3', 'h2'):
+        for tag in entrytext.select(heading):
+            child = tag.find('em')
+            if child:
+                key = tag.next.rstrip(', ').strip().replace('\u200b', '')
+                key = re.sub(r"^\d+\.\s*", "", key)
+                value = child.text.strip().replace('\u200b', '')
+                dict[key] = value
+
+    return dict
+
+
+class AlbumPlaylistUpdater:
+    """
+    Adds whole albums to a playlist, from a review page or given by hand.
+
+    The Spotify client and worker pools come from a SpotifyContext; the page fetcher
+    (and with it bs4) is only set up once a page has to be scraped.
+    """
+
+    def __init__(self, context, settings=None):
+        self.context = context
+        self.settings = settings or AlbumSettings()
+        self._fetcher = None
+
+    @property
+    def sp(self):
+        return self.context.sp
+
+    @property
+    def fetcher(self):
+        if self._fetcher is None:
+            from .fetcher import Fetcher
+
+            settings = self.settings
+            self._fetcher = Fetcher(settings.http_cache_dir, max_workers=settings.max_fetch_workers, per_host=settings.max_requests_per_host, min_interval=settings.host_min_interval)
+            self.context.metrics.instrument(self._fetcher.session, endpoint=host_endpoint)
+        return self._fetcher
+
+    def get_albums(self, album_ids):
+        """
+        Fetch albums albums_per_request at a time, with every track of albums longer than one page.
+
+        Returns a dict of album ID to album, unknown IDs are left out.
+        """
+        album_ids = list(dict.fromkeys(album_ids))
+        per_request = self.settings.albums_per_request
+        batches = [album_ids[start:start + per_request] for start in range(0, len(album_ids), per_request)]
+        albums = {}
+        for batch in self.context.executor.map(lambda ids: self.sp.albums(ids)['albums'], batches):
+            for album in batch:
+                if album:
+                    albums[album['id']] = album
+        for album in albums.values():
+            tracks = album['tracks']
+            while tracks.get('next'):
+                tracks = self.sp.next(tracks)
+                album['tracks']['items'].extend(tracks['items'])
+        return albums
+
+    def scrape_thedevilsmouth(self, document):
+        """Return the scraped artists and albums and the albums of Spotify embeds by artist."""
+        dict = {}
+        known_albums = {}
+        links = scrape_iframes(document)
+        # Every bandcamp player is fetched once, all of them at the same time
+        players = {player.url: player for player in self.fetcher.documents([link for link in links if 'bandcamp.com' in link])}
+        # Spotify embeds are fetched in batches and go straight to the playlist without a search
+        embedded_albums = self.get_albums([embedded_album_id(link) for link in links if link not in players and embedded_album_id(link)])
+        for link in links:
+            if link in players:
+                dict = scrape_track(players[link], dict)
+            elif embedded_album_id(link) in embedded_albums:
+                album_data = embedded_albums[embedded_album_id(link)]
+                dict = get_album_and_artist(album_data, dict)
+                known_albums[album_data['artists'][0]['name']] = album_data
+
+        return dict, known_albums
+
+    # Function to scrape bandname, album, and title from a website
+    def scrape_website(self, url):
+        # The page is fetched once and shared by the extractors
+        document = self.fetcher.document(url)
+        dict = {}
+        known_albums = {}
+        if "theobelisk" in url:
+            dict = scrape_theobelisk(document)
+        elif "thedevilsmouth" in url:
+            dict, known_albums = self.scrape_thedevilsmouth(document)
+
+        title = document.title().replace('\u200b', '')
+
+        return dict, title, known_albums
+
+    def search_album(self, bandname, album):
+        query = f"album:{album} artist:{bandname}"
+        results = self.sp.search(q=query, type='album', limit=1)
+        if results['albums']['items']:
+            return results['albums']['items'][0]['id']
+        return None
+
+    def get_playlist_track_uris(self, playlist_id):
+        """Return the URIs of a playlist's tracks and its snapshot_id."""
+        uris = set()
+        playlist = self.sp.playlist(playlist_id, fields="snapshot_id,tracks(items(track(uri)),next)")
+        results = playlist.get('tracks')
+        while results:
+            for item in results.get('items', []):
+                track = item.get('track')
+                if track and track.get('uri'):
+                    uris.add(track['uri'])
+            results = self.sp.next(results) if results.get('next') else None
+        return uris, playlist['snapshot_id']
+
+    # Function to search Spotify and add to a playlist
+    def search_and_add_to_playlist(self, dict, playlist_name, url=None, known_albums=None):
+        """
+        Add the albums of all scraped artists to the playlist.
+
+        Albums are searched in parallel, fetched in batches with all their tracks, and tracks
+        already in the playlist are skipped before the rest goes to the write queue.
+        known_albums maps artists to albums that were already fetched, e.g. from Spotify embeds.
+        Returns the write report of the playlist.
+        """
+        settings = self.settings
+        sp = self.sp
+        metrics = self.context.metrics
+        known_albums = known_albums or {}
+        user_id = self.context.user_id()
+        playlist_index = UserPlaylistIndex(sp, os.path.join(settings.cache_dir, settings.playlist_index_json.format(user_id=user_id)) if settings.persist_playlist_index else None)
+        playlist_id = playlist_index.get(playlist_name)
+        timestamp_short = datetime.now().strftime('%Y-%m-%d')
+        if not playlist_id:
+            logging.info(f"Creating new playlist: {playlist_name}")
+            description = f'Generated automatically on {timestamp_short}.' + (f' Source: {url}' if url else '')
+            new_playlist = playlist_index.create(user_id, playlist_name, description, self.context.scheduler)
+            playlist_id = new_playlist['id']
+            existing_uris, snapshot_id = set(), new_playlist.get('snapshot_id')
+        else:
+            logging.info(f"Playlist '{playlist_name}' already exists.")
+            existing_uris, snapshot_id = self.get_playlist_track_uris(playlist_id)
+
+        with metrics.phase('resolve'):
+            searches = [(bandname, album) for bandname, album in dict.items() if bandname not in known_albums]
+            album_ids = {bandname: album_id for (bandname, _), album_id in zip(searches, self.context.executor.map(lambda search: self.search_album(*search), searches))}
+            albums = self.get_albums([album_id for album_id in album_ids.values() if album_id])
+
+        # Albums are queued in page order and written behind in full batches
+        write_queue = self.context.write_queue
+        for bandname, album in dict.items():
+            logging.info(f"Scraped data - Bandname: {bandname}, Album: {album}")
+            album_data = known_albums.get(bandname) or albums.get(album_ids.get(bandname))
+            if not album_data:
+                logging.warning(f"No album found for '{album}' by '{bandname}'.")
+                continue
+            track_uris = []
+            for track in album_data['tracks']['items']:
+                if track['uri'] not in existing_uris:
+                    existing_uris.add(track['uri'])
+                    track_uris.append(track['uri'])
+            write_queue.add(playlist_id, track_uris, snapshot_id)
+
+        with metrics.phase('write'):
+            report = write_queue.flush([playlist_id])[playlist_id]
+        logging.info(f"Added {report['tracks']} tracks to '{playlist_name}' in {report['batches_written']} batches.")
+        if report['failed']:
+            logging.error(f"Failed to add {len(report['failed'])} tracks to '{playlist_name}'.")
+        return report
+
+    def add_url(self, url, playlist_name=None):
+        """Scrape the albums reviewed on a page into a playlist, named after the page title unless playlist_name is given."""
+        with self.context.metrics.phase('scrape'):
+            dict, title, known_albums = self.scrape_website(url)
+        self.fetcher.log_stats()
+        #Devils mouth: Top 30 2024
+        #https://thedevilsmouth.substack.com/p/top-30-albums-2024-part-i-30-25
+        return self.search_and_add_to_playlist(dict, playlist_name or title, url, known_albums)
+
+    def add_album(self, bandname, album, playlist_name):
+        return self.search_and_add_to_playlist({bandname: album}, playlist_name)
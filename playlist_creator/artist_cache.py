@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Tables kept in the cache database, one per kind of Spotify lookup
+TABLES = ('search', 'top_tracks')
+EVICT_FRACTION = 0.1 # Share of max_entries evicted at once from a full table, so inserts rarely have to evict
+
+
+class ArtistCache:
+    """
+    Persistent SQLite cache for artist search results and top tracks.
+
+    Entries expire after a per-table TTL and the least recently used entries
+    are evicted in chunks once a table holds more than max_entries rows. With refresh, entries
+    fetched before refresh_since (by default when the cache is opened) are ignored.
+    """
+
+    def __init__(self, path, ttls, max_entries=20000, refresh=False, refresh_since=None):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.ttls = ttls
+        self.max_entries = max_entries
+        # A resumed run passes its original start, so entries refreshed before the interruption are kept
+        self.refresh_since = (refresh_since or time.time()) if refresh else None
+        self.hits = {table: 0 for table in TABLES}
+        self.misses = {table: 0 for table in TABLES}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            for table in TABLES:
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                    "fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table}(accessed_at)")
+        # Upper bound of the rows per table, replaced entries are counted too until the next eviction check
+        self._sizes = {table: self._count(table) for table in TABLES}
+
+    def _count(self, table):
+        return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def get(self, table, key):
+        """Return the cached value or None if it is missing, expired or a refresh was requested."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, fetched_at FROM {table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttls[table] or (self.refresh_since and row[1] < self.refresh_since):
+                self.misses[table] += 1
+                return None
+            with self._conn:
+                self._conn.execute(f"UPDATE {table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits[table] += 1
+            return json.loads(row[0])
+
+    def set(self, table, key, value):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {table} (key, value, fetched_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._sizes[table] += 1
+            if self._sizes[table] <= self.max_entries:
+                return
+            # Evict the least recently used entries down to below the size bound, through the accessed_at index
+            size = self._count(table)
+            excess = size - self.max_entries + int(self.max_entries * EVICT_FRACTION) if size > self.max_entries else 0
+            if excess:
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE key IN ("
+                    f"SELECT key FROM {table} ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                )
+            self._sizes[table] = size - excess
+
+    def log_stats(self):
+        for table in TABLES:
+            logging.info(f"Cache '{table}': {self.hits[table]} hits, {self.misses[table]} misses")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,568 @@
+import itertools
+import json
+import logging
+import math
+import os
+import unicodedata
+from collections import Counter
+from datetime import datetime
+
+from .artist_cache import ArtistCache
+from .fuzzy_match import ArtistAliases, rank_approximate_matches
+from .genre_engine import GenreEngine, GenreProfile
+from .list_reader import batch_playlists, iter_playlists
+from .playlist_index import UserPlaylistIndex
+from .playlist_sync import apply_playlist_diff, diff_playlist
+from .run_journal import RunJournal
+from .settings import ArtistSettings
+from .sync_state import SyncState
+
+DESCRIPTION = 'Generated automatically on {date}. Learn more on GitHub: github.com/bschkuhl/spotify-playlist-creator'
+
+
+def normalize_string(s):
+    """Normalize string to remove special characters and accents."""
+    return unicodedata.normalize('NFKD', s).encode('ASCII', 'ignore').decode('ASCII').lower()
+
+
+def artist_summary(item):
+    """Keep only the artist fields used for matching, so search results stay small in the cache."""
+    return {key: item.get(key) for key in ('id', 'name', 'genres', 'popularity')}
+
+
+class ArtistPlaylistUpdater:
+    """
+    Creates and updates playlists with the top tracks of the artists in a list file.
+
+    The Spotify client and worker pools come from a SpotifyContext, so one updater can run
+    any number of lists with the same authenticated client. An updater runs one list at a time.
+    """
+
+    def __init__(self, context, settings=None):
+        self.context = context
+        self.settings = settings or ArtistSettings()
+        self.country_prefixes = None
+        self.artist_aliases = None
+
+    @property
+    def sp(self):
+        return self.context.sp
+
+    def _load_helpers(self):
+        """Read the country prefixes and artist aliases, once per updater."""
+        if self.artist_aliases is not None:
+            return
+        with open(os.path.join(self.settings.helper_dir, self.settings.country_prefixes_json), "r") as file:
+            self.country_prefixes = json.load(file)['country_prefixes']
+        with open(os.path.join(self.settings.helper_dir, self.settings.artist_aliases_json), "r") as file:
+            aliases_file = json.load(file)
+        self.artist_aliases = ArtistAliases(aliases_file.get('aliases'), aliases_file.get('artist_ids'), aliases_file.get('patterns'), normalize=normalize_string)
+
+    def empty_playlist_snapshot(self, playlist_id, snapshot_id=None):
+        """Register the snapshot of a playlist known to be empty (new or just cleared)."""
+        snapshot = {
+            'snapshot_id': snapshot_id,
+            'uris': set(),
+            'artist_names': set(),
+            'artist_ids': set(),
+            'positions': {},
+            'ordered_uris': [],
+        }
+        if snapshot_id:
+            self.playlist_snapshots[playlist_id] = snapshot
+        return snapshot
+
+    def build_playlist_snapshot(self, playlist_id):
+        """Page through a playlist once and index its tracks and artists."""
+        results = self.sp.playlist(playlist_id, fields="snapshot_id,tracks(items(track(uri,artists(id,name))),next)")
+        snapshot = self.empty_playlist_snapshot(playlist_id)
+        snapshot['snapshot_id'] = results['snapshot_id']
+        tracks = results.get('tracks')
+        position = 0
+        while tracks:
+            for item in tracks.get('items', []):  # Safely handle missing 'items'
+                track = item.get('track')
+                snapshot['ordered_uris'].append(track.get('uri') if track else None)
+                if track and track.get('uri'):
+                    snapshot['uris'].add(track['uri'])
+                    snapshot['positions'].setdefault(track['uri'], []).append(position)
+                    for artist in track.get('artists', []):
+                        if artist.get('name'):
+                            snapshot['artist_names'].add(normalize_string(artist['name']))
+                        if artist.get('id'):
+                            snapshot['artist_ids'].add(artist['id'])
+                position += 1
+            tracks = self.sp.next(tracks) if tracks.get('next') else None  # Safely handle 'next'
+        return snapshot
+
+    def get_playlist_snapshot(self, playlist_id):
+        """Return the playlist snapshot, rebuilding it only when the snapshot_id changed."""
+        snapshot = self.playlist_snapshots.get(playlist_id)
+        if snapshot:
+            snapshot_id = self.sp.playlist(playlist_id, fields="snapshot_id")['snapshot_id']
+            if snapshot_id == snapshot['snapshot_id']:
+                return snapshot
+        snapshot = self.build_playlist_snapshot(playlist_id)
+        self.playlist_snapshots[playlist_id] = snapshot
+        return snapshot
+
+    def get_playlist_index(self):
+        # Built on first use, once per run
+        if self.playlist_index is None:
+            cache_path = os.path.join(self.settings.cache_dir, self.settings.playlist_index_json.format(user_id=self.context.user_id())) if self.settings.persist_playlist_index else None
+            self.playlist_index = UserPlaylistIndex(self.sp, cache_path)
+        return self.playlist_index
+
+    def artist_exists_in_playlist(self, snapshot, artist_name):
+        return normalize_string(artist_name) in snapshot['artist_names'] or self.artist_key(artist_name) in snapshot['artist_names']
+
+    def artist_key(self, artist):
+        """Normalized name an artist is resolved as, after applying the local aliases."""
+        return self.artist_aliases.canonical(normalize_string(artist))
+
+    def search_page(self, query, offset=0):
+        return self.sp.search(q=query, type='artist', limit=self.settings.get_lim, offset=offset)['artists']
+
+    def search_artist(self, normalized_artistname):
+        """
+        Search for an artist, paging through up to get_max results unless the first page has a confident match.
+
+        Returns the exact name matches, all candidates of the fetched pages and the number of pages fetched.
+        """
+        cached = self.artist_cache.get('search', normalized_artistname)
+        if cached is not None and 'candidates' in cached:
+            return cached['exact_matches'], cached['candidates'], 0
+
+        get_lim = self.settings.get_lim
+        # A quoted field filter ranks the exact name first, fall back to a plain query if it finds nothing
+        query = f'artist:"{normalized_artistname}"'
+        results = self.search_page(query)
+        pages = 1
+        if not results['items']:
+            query = normalized_artistname
+            results = self.search_page(query)
+            pages += 1
+        candidates = list(results['items'])
+        exact_matches = [item for item in results['items'] if normalize_string(item['name']) == normalized_artistname]
+
+        # Only page on if the first page leaves the artist ambiguous or unknown
+        confident = len(exact_matches) == 1 and exact_matches[0]['popularity'] >= self.settings.confident_popularity
+        total_results = results['total']
+        offsets = []
+        if not confident and total_results > get_lim: # if there are more than the first get_lim results, get them all
+            i = 1
+            while i * get_lim < total_results and i * get_lim <= self.settings.get_max:
+                offsets.append(i * get_lim)
+                i += 1
+        # The remaining pages are fetched concurrently, in their own pool so nested waits cannot starve the artist workers
+        for results in self.context.page_executor.map(lambda offset: self.search_page(query, offset), offsets):
+            pages += 1
+            candidates += results['items']
+            exact_matches += [item for item in results['items'] if normalize_string(item['name']) == normalized_artistname]
+
+        exact_matches = [artist_summary(item) for item in exact_matches]
+        candidates = [artist_summary(item) for item in candidates]
+        self.artist_cache.set('search', normalized_artistname, {'exact_matches': exact_matches, 'candidates': candidates})
+        return exact_matches, candidates, pages
+
+    def lookup_artist(self, artist_id):
+        """Fetch an artist by ID, for aliases that map straight to a Spotify artist."""
+        cached = self.artist_cache.get('search', f"id:{artist_id}")
+        if cached is not None:
+            return cached
+        artist = artist_summary(self.sp.artist(artist_id))
+        self.artist_cache.set('search', f"id:{artist_id}", artist)
+        return artist
+
+    def get_top_track_uris(self, artist_id):
+        """Return the URIs of an artist's top tracks."""
+        cached = self.artist_cache.get('top_tracks', artist_id)
+        if cached is not None:
+            return cached
+        uris = [track['uri'] for track in self.sp.artist_top_tracks(artist_id)['tracks']]
+        self.artist_cache.set('top_tracks', artist_id, uris)
+        return uris
+
+    def fetch_top_tracks(self, artist_id):
+        """Return the first three top track URIs of an artist and the number of API calls that took."""
+        start = self.context.scheduler.thread_requests()
+        top_tracks = self.get_top_track_uris(artist_id)[:3]
+        return top_tracks, self.context.scheduler.thread_requests() - start
+
+    def resolve_artist(self, artist):
+        """
+        Search for an artist and prefetch the top tracks of an unambiguous match.
+
+        Runs on the worker pool; the decisions are logged afterwards in playlist order.
+        """
+        settings = self.settings
+        scheduler = self.context.scheduler
+        normalized_artistname = self.artist_key(artist)
+        artist_id = self.artist_aliases.artist_id(normalized_artistname)
+        if artist_id:
+            start = scheduler.thread_requests()
+            exact_matches = [self.lookup_artist(artist_id)]
+            candidates = exact_matches
+            pages = 0
+            api_calls = scheduler.thread_requests() - start
+        else:
+            # Some pages are fetched on the page pool, where this thread's request count cannot see them
+            exact_matches, candidates, pages = self.search_artist(normalized_artistname)
+            api_calls = pages
+
+        approximate_matches = []
+        if not exact_matches and settings.use_lev:
+            approximate_matches = rank_approximate_matches(normalized_artistname, candidates, settings.approx_matches, settings.approx_min_score, normalize_string)
+            # Treat the closest approximate matches as exact matches for further processing
+            exact_matches = [match for match, distance, _ in approximate_matches if distance == approximate_matches[0][1]]
+
+        best_match = None
+        if len(exact_matches) == 1:
+            best_match = exact_matches[0]
+        elif exact_matches and not settings.pick_genre_proximity and settings.pick_higher_popularity:
+            best_match = max(exact_matches, key=lambda x: x['popularity'])
+        top_tracks, top_track_calls = self.fetch_top_tracks(best_match['id']) if best_match else ([], 0)
+        return {
+            'exact_matches': exact_matches,
+            'approximate_matches': approximate_matches,
+            'candidates': candidates,
+            'pages': pages,
+            'top_tracks': top_tracks,
+            'api_calls': api_calls + top_track_calls,
+        }
+
+    def pick_genre_matches(self, groups):
+        """
+        Pick the match of each ambiguous artist whose genres fit the playlist genre profile best.
+
+        groups is a list of (artist name, candidates, genre profile); all candidates are scored in one batch.
+        """
+        best_matches = []
+        for (artist_name, group, _), scores in zip(groups, self.genre_engine.score([(group, profile) for _, group, profile in groups])):
+            scores_str = ", ".join(f"{candidate['name']} ({candidate['id']}) {score:.3f}" for candidate, score in zip(group, scores))
+            logging.info(f"Genre scores for artist '{artist_name}': {scores_str}")
+            # Find the item(s) with the highest genre score
+            max_score = scores.max()
+            genre_matches = [candidate for candidate, score in zip(group, scores) if score > 0 and math.isclose(score, max_score)]
+
+            if len(genre_matches) > 1:
+                best_match = max(genre_matches, key=lambda x: x['popularity'])
+                logging.info(f"Choosing the most popular match for artist '{artist_name}': {best_match['name']} with popularity {best_match['popularity']}")
+            elif len(genre_matches) == 1:
+                best_match = genre_matches[0]  # Take the first item if there's only one match
+                logging.info(f"Choosing the best genre match for artist '{artist_name}': {best_match['name']} with genre score {max_score:.3f}")
+            elif self.settings.pick_higher_popularity and self.settings.pick_low_confidence:
+                best_match = max(group, key=lambda x: x['popularity'])
+                logging.warning(f"Low confidence: Choosing the most popular match for artist '{artist_name}': {best_match['name']} with popularity {best_match['popularity']}")
+            else:
+                logging.warning(f"Skipping artist '{artist_name}' due to no genre matches and pick_higher_popularity set to False")
+                best_match = None
+            best_matches.append(best_match)
+        return best_matches
+
+    def queue_tracks(self, job, uris):
+        """Add the tracks of an artist that are not in the playlist yet, written behind unless the playlist is synced."""
+        uris = [uri for uri in uris if uri not in job['existing_tracks']]
+        job['track_uris'].extend(uris)
+        if not job['sync']:
+            self.context.write_queue.add(job['playlist_id'], uris, job['snapshot']['snapshot_id'])
+
+    def process_playlists(self, playlists, first_index):
+        """
+        Create or update one batch of playlists, numbered from first_index in list order.
+
+        Returns how often each artist is listed in the batch, the resolutions of its unique artists and their names.
+        """
+        settings = self.settings
+        sp = self.sp
+        metrics = self.context.metrics
+        description = DESCRIPTION.format(date=self.timestamp_short)
+        artist_entries = Counter() # How often each artist is listed across all playlists of the batch
+
+        with metrics.phase('prepare'):
+            # Prepare every playlist of the batch first, so the missing artists of all its playlists are known up front
+            playlist_jobs = []
+            for index, playlist in enumerate(playlists, first_index):
+                state = self.sync_state.get(self.list_key, playlist["playlistName"]) if self.sync_state else None
+                if state and state['hash'] == SyncState.playlist_hash(playlist):
+                    logging.info(f"Playlist '{playlist['playlistName']}' is unchanged since the last sync, skipping.")
+                    continue
+
+                artists = playlist["artists"]
+                removed_artists = []
+                sync = False
+                if state:
+                    # Only the artists added or removed since the last sync are processed
+                    logging.info(f"Playlist '{playlist['playlistName']}' changed since the last sync, updating the changed artists...")
+                    existing_playlist_id = state['playlist_id']
+                    snapshot = self.get_playlist_snapshot(existing_playlist_id)
+                    listed_artists = {self.artist_key(artist) for artist in artists}
+                    removed_artists = [normalized_artistname for normalized_artistname in state['artist_tracks'] if normalized_artistname not in listed_artists]
+                    artists = [artist for artist in artists if self.artist_key(artist) not in state['artist_tracks']]
+                # Check if the playlist already exists
+                elif existing_playlist_id := self.get_playlist_index().get(playlist["playlistName"]):
+                    logging.info(f"Playlist '{playlist['playlistName']}' already exists.")
+                    if settings.sync_playlist:
+                        logging.info(f"Computing changes to sync the playlist...")
+                        snapshot = self.get_playlist_snapshot(existing_playlist_id)
+                        sync = None not in snapshot['ordered_uris']
+                        if not sync:
+                            logging.warning(f"Playlist '{playlist['playlistName']}' contains unavailable tracks, only adding missing tracks instead of syncing.")
+                    elif settings.clear_playlist and index not in self.journal.cleared:
+                        # Clear the playlist, unless an interrupted run already did
+                        logging.info("Clearing the playlist...")
+                        sp.playlist_change_details(existing_playlist_id, description=description)
+                        cleared = sp.playlist_replace_items(existing_playlist_id, [])  # This removes all existing tracks in the playlist
+                        logging.info("Playlist cleared.")
+                        self.journal.playlist_cleared(index)
+                        snapshot = self.empty_playlist_snapshot(existing_playlist_id, cleared.get('snapshot_id'))
+                    else: # Update
+                        logging.info(f"Checking for missing tracks...")
+                        snapshot = self.get_playlist_snapshot(existing_playlist_id)
+                else:
+                    logging.info(f"Creating new playlist: {playlist['playlistName']}")
+                    new_playlist = self.get_playlist_index().create(self.context.user_id(), playlist["playlistName"], description, self.context.scheduler)
+                    existing_playlist_id = new_playlist['id']
+                    snapshot = self.empty_playlist_snapshot(existing_playlist_id, new_playlist.get('snapshot_id'))
+
+                # Artists listed more than once are only processed for their first entry
+                pending_artists = {}
+                for artist in artists:
+                    # A sync needs the tracks of every listed artist to know the desired playlist,
+                    # the sync state needs to know which tracks belong to which artist
+                    if sync or self.sync_state or not self.artist_exists_in_playlist(snapshot, artist):
+                        artist_entries[self.artist_key(artist)] += 1
+                        pending_artists.setdefault(self.artist_key(artist), artist)
+                playlist_jobs.append({
+                    'index': index,
+                    'playlist': playlist,
+                    'playlist_id': existing_playlist_id,
+                    'snapshot': snapshot,
+                    'sync': sync,
+                    'existing_tracks': set() if sync else snapshot['uris'],
+                    'pending_artists': pending_artists,
+                    'state': state,
+                    'removed_artists': removed_artists,
+                    'artist_tracks': {normalized_artistname: [] for normalized_artistname in pending_artists},
+                    'track_uris': [],
+                    'genre_list': [],
+                    'genre_profile': GenreProfile(self.genre_engine),
+                    'ambiguous_artists': [],
+                })
+
+        with metrics.phase('resolve'):
+            # Resolve every unique artist exactly once for all playlists
+            unique_artists = {}
+            for job in playlist_jobs:
+                for normalized_artistname, artist in job['pending_artists'].items():
+                    unique_artists.setdefault(normalized_artistname, artist)
+            # Resolutions arrive in the order the artists are first listed, so every playlist is processed
+            # (and its tracks queued for writing) as soon as its artists are resolved
+            resolutions = self.context.executor.map(self.resolve_artist, unique_artists.values())
+            resolution_table = {}
+
+            for job in playlist_jobs:
+                # Process artists and their top tracks in playlist order
+                for normalized_artistname, artist in job['pending_artists'].items():
+                    if normalized_artistname not in resolution_table:
+                        resolution_table[normalized_artistname] = next(resolutions)
+                    resolution = resolution_table[normalized_artistname]
+                    exact_matches = resolution['exact_matches']
+
+                    if resolution['approximate_matches']:
+                        approximate_str = ", ".join(f"{match['name']} (distance {distance}, score {score:.2f})" for match, distance, score in resolution['approximate_matches'])
+                        logging.info(f"Found approximate matches for artist '{artist}': {approximate_str}")
+                    elif not exact_matches and settings.use_lev:
+                        logging.info(f"No matches (exact or approximate) found for artist '{artist}'")
+
+                    if exact_matches:
+                        if len(exact_matches) > 1:
+                            # Log multiple exact matches
+                            logging.info(f"Multiple exact matches found for artist '{artist}': {[match['name'] for match in exact_matches]}")
+                            if settings.pick_genre_proximity:
+                                job['ambiguous_artists'].append(normalized_artistname)
+                                continue
+                            elif settings.pick_higher_popularity:
+                                # Choose the match with the highest popularity
+                                best_match = max(exact_matches, key=lambda x: x['popularity'])
+                                logging.info(f"Choosing the most popular match for artist '{artist}': {best_match['name']} with popularity {best_match['popularity']}")
+                            else:
+                                # Skip processing if not picking the most popular match
+                                logging.warning(f"Skipping artist '{artist}' due to multiple matches and pick_higher_popularity set to False")
+                                continue
+                        else:
+                            # Single match
+                            best_match = exact_matches[0]
+
+                        # Process the best match, its top tracks were fetched while resolving
+                        job['genre_list'] += self.genre_engine.normalize(best_match['genres'])
+                        job['genre_profile'].add(best_match['genres'])
+
+                        job['artist_tracks'][normalized_artistname] = resolution['top_tracks']
+                        self.queue_tracks(job, resolution['top_tracks'])
+                    else:
+                        logging.warning(f"No exact match found for artist '{artist}' in:")
+                        logging.warning(f"{[item['name'].lower() for item in resolution['candidates'][:settings.get_lim]]}")
+
+        with metrics.phase('disambiguate'):
+            if settings.pick_genre_proximity:
+                # Disambiguate every artist once, against the genres of all playlists that list it
+                ambiguous_profiles = {}
+                for job in playlist_jobs:
+                    for normalized_artistname in job['ambiguous_artists']:
+                        ambiguous_profiles.setdefault(normalized_artistname, GenreProfile(self.genre_engine)).merge(job['genre_profile'])
+                picks = self.pick_genre_matches([
+                    (unique_artists[normalized_artistname], resolution_table[normalized_artistname]['exact_matches'], profile)
+                    for normalized_artistname, profile in ambiguous_profiles.items()
+                ])
+                best_matches = {normalized_artistname: best_match for normalized_artistname, best_match in zip(ambiguous_profiles, picks) if best_match}
+
+                # Fetch the top tracks of the chosen matches in parallel
+                for normalized_artistname, (top_tracks, api_calls) in zip(best_matches, self.context.executor.map(lambda match: self.fetch_top_tracks(match['id']), best_matches.values())):
+                    resolution_table[normalized_artistname]['top_tracks'] = top_tracks
+                    resolution_table[normalized_artistname]['api_calls'] += api_calls
+
+                for job in playlist_jobs:
+                    for normalized_artistname in job['ambiguous_artists']:
+                        if normalized_artistname in best_matches:
+                            job['artist_tracks'][normalized_artistname] = resolution_table[normalized_artistname]['top_tracks']
+                            self.queue_tracks(job, resolution_table[normalized_artistname]['top_tracks'])
+
+        with metrics.phase('write'):
+            # Wait for the tracks queued while resolving
+            written = self.context.write_queue.flush([job['playlist_id'] for job in playlist_jobs])
+            for job in playlist_jobs:
+                playlist = job['playlist']
+                if job['removed_artists']:
+                    # Remove the tracks of removed artists, unless a listed artist contributed the same track
+                    kept_uris = {uri for tracks in job['artist_tracks'].values() for uri in tracks}
+                    kept_uris.update(uri for normalized_artistname, tracks in job['state']['artist_tracks'].items() if normalized_artistname not in job['removed_artists'] for uri in tracks)
+                    removed_uris = list(dict.fromkeys(uri for normalized_artistname in job['removed_artists'] for uri in job['state']['artist_tracks'][normalized_artistname]
+                                                      if uri not in kept_uris and uri in job['snapshot']['uris']))
+                    for i in range(0, len(removed_uris), settings.batch_size):
+                        sp.playlist_remove_all_occurrences_of_items(job['playlist_id'], removed_uris[i:i + settings.batch_size])
+                    logging.info(f"Removed {len(removed_uris)} tracks of {len(job['removed_artists'])} artists no longer listed in '{playlist['playlistName']}'.")
+
+                # New tracks were added by the write queue, a synced playlist is written in one go
+                track_uris = job['track_uris']
+                if job['sync']:
+                    removals, moves, additions = diff_playlist(job['snapshot']['ordered_uris'], track_uris)
+                    write_calls, _ = apply_playlist_diff(sp, self.context.scheduler, job['playlist_id'], job['snapshot']['snapshot_id'], removals, moves, additions)
+                    # Updated after the writes, so their failure checks compare against the snapshot_id they were based on
+                    if removals or moves or additions:
+                        sp.playlist_change_details(job['playlist_id'], description=description)
+                    logging.info(f"Synced playlist '{playlist['playlistName']}': removed {len(removals)}, moved {len(moves)} and added {sum(len(uris) for _, uris in additions)} tracks in {write_calls} write calls.")
+                elif track_uris:
+                    report = written[job['playlist_id']]
+                    logging.info(f"Added {report['tracks']} tracks in {report['batches_written']} batches to the playlist '{playlist['playlistName']}'.")
+                failed_uris = written[job['playlist_id']]['failed']
+                if failed_uris:
+                    logging.error(f"Failed to add {len(failed_uris)} tracks to the playlist '{playlist['playlistName']}'.")
+                    self.failed_playlists.append(playlist['playlistName'])
+
+                if job['genre_list']:
+                    genre_list_str = ", ".join(job['genre_list'])
+                    logging.info(f"Playlist contains the following genres: {genre_list_str}")
+                if self.sync_state and not failed_uris:
+                    artist_tracks = {normalized_artistname: tracks for normalized_artistname, tracks in (job['state'] or {'artist_tracks': {}})['artist_tracks'].items() if normalized_artistname not in job['removed_artists']}
+                    artist_tracks.update(job['artist_tracks'])
+                    self.sync_state.set(self.list_key, playlist['playlistName'], SyncState.playlist_hash(playlist), job['playlist_id'], artist_tracks, self.timestamp)
+                # The journal only counts the playlists up to the first one with missing tracks, so a resumed run retries it
+                if not self.failed_playlists:
+                    self.journal.playlist_done(job['index'])
+                logging.info(f"Finished updating playlist: {playlist['playlistName']}\n\n")
+
+        return artist_entries, resolution_table, unique_artists
+
+    def list_path(self, list_name):
+        """Path of a list file: a path is used as given, a bare file name is looked up in lists_dir first."""
+        separators = tuple(sep for sep in (os.sep, os.altsep) if sep)
+        in_lists_dir = os.path.join(self.settings.lists_dir, list_name)
+        if any(sep in list_name for sep in separators) or (not os.path.exists(in_lists_dir) and os.path.exists(list_name)):
+            return list_name
+        return in_lists_dir
+
+    def run(self, list_name, refresh=False, resume=False, incremental=False):
+        """
+        Create or update every playlist of a list file in lists_dir, or at a path.
+
+        refresh ignores cached artist searches and top tracks, resume continues the last
+        interrupted run over the list and incremental skips playlists whose artists did not
+        change since the last incremental run. Returns a summary of the run.
+        """
+        settings = self.settings
+        self._load_helpers()
+        os.makedirs(settings.log_dir, exist_ok=True)
+        self.timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        self.timestamp_short = datetime.now().strftime('%Y-%m-%d')
+        file_path = self.list_path(list_name)
+        self.list_key = os.path.abspath(file_path)
+        # Finished playlists are journaled, resolved artists are checkpointed by the artist cache
+        self.journal = RunJournal(os.path.join(settings.cache_dir, settings.journal_jsonl.format(list_name=os.path.splitext(os.path.basename(file_path))[0])), self.list_key, resume=resume)
+        self.artist_cache = ArtistCache(
+            os.path.join(settings.cache_dir, settings.artist_cache_db),
+            ttls={'search': settings.search_cache_ttl, 'top_tracks': settings.top_tracks_cache_ttl},
+            max_entries=settings.cache_max_entries,
+            refresh=refresh,
+            refresh_since=self.journal.started_at
+        )
+        self.sync_state = SyncState(os.path.join(settings.cache_dir, settings.sync_state_json)) if incremental else None
+        # Genre frequencies are learned from the artists resolved in this run
+        self.genre_engine = GenreEngine(self.country_prefixes)
+        self.playlist_index = None
+        self.failed_playlists = []
+        # Playlist snapshots keyed by playlist ID, each built in a single paginated pass
+        self.playlist_snapshots = {}
+
+        try:
+            playlists = 0
+            resolved_artists = 0
+            listed_entries = 0
+            saved_calls = 0
+            search_pages_count = Counter()
+            search_pages_path = os.path.join(settings.log_dir, f'search_pages_{self.timestamp}.jsonl')
+            first_index = self.journal.completed
+            # Playlists finished by an interrupted run are skipped, only one batch of playlists is held in memory
+            for batch in batch_playlists(itertools.islice(iter_playlists(file_path), self.journal.completed, None), settings.max_artists_per_batch):
+                artist_entries, resolution_table, unique_artists = self.process_playlists(batch, first_index)
+                # Saved once per batch instead of once per playlist, the state of a large list is big
+                if self.sync_state:
+                    self.sync_state.save()
+                first_index += len(batch)
+                playlists += len(batch)
+
+                # Every repeated entry of an artist would have repeated the API calls of its resolution
+                saved_calls += sum((artist_entries[normalized_artistname] - 1) * resolution['api_calls'] for normalized_artistname, resolution in resolution_table.items())
+                resolved_artists += len(resolution_table)
+                listed_entries += sum(artist_entries.values())
+                # Snapshots are only reused within a batch, a playlist is never split over two batches
+                self.playlist_snapshots.clear()
+
+                # Record how many search pages each artist needed, to tune get_max and confident_popularity
+                with open(search_pages_path, "a") as file:
+                    for normalized_artistname, resolution in resolution_table.items():
+                        search_pages_count[resolution['pages']] += 1
+                        file.write(json.dumps({'artist': unique_artists[normalized_artistname], 'pages': resolution['pages']}, ensure_ascii=False) + "\n")
+
+            logging.info(f"Resolved {resolved_artists} unique artists for {listed_entries} playlist entries, saving {saved_calls} API calls.")
+            pages_str = ", ".join(f"{pages} pages: {count}" for pages, count in sorted(search_pages_count.items()))
+            logging.info(f"Artists per number of search pages fetched (0 = cached): {pages_str}")
+
+            if self.failed_playlists:
+                logging.error(f"Not all tracks could be added to {len(self.failed_playlists)} playlists: {', '.join(self.failed_playlists)}")
+            logging.info(f"Finished updating playlists.")
+            self.artist_cache.log_stats()
+        finally:
+            # Playlists finished before an error stay synced
+            if self.sync_state:
+                self.sync_state.save()
+            self.artist_cache.close()
+            self.journal.close()
+        return {
+            'list': self.list_key,
+            'playlists': playlists,
+            'resolved_artists': resolved_artists,
+            'listed_entries': listed_entries,
+            'saved_calls': saved_calls,
+            'failed_playlists': self.failed_playlists,
+        }
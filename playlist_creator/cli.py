@@ -0,0 +1,187 @@
+import argparse
+import dataclasses
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+from .albums import AlbumPlaylistUpdater
+from .artists import ArtistPlaylistUpdater
+from .context import INITIAL_REQUESTS_PER_SECOND, MAX_REQUESTS_PER_SECOND, MAX_WORKERS, SpotifyContext
+from .list_reader import LIST_SUFFIXES
+from .metrics import Metrics
+from .settings import AlbumSettings, ArtistSettings
+
+LIST_JSON = "festivals.json" # Replace with your own JSON or JSONL file
+POLL_INTERVAL = 30 # Seconds between two checks of the lists directory
+LOG_FILES = {
+    'artists': 'artist_search_{timestamp}.log',
+    'albums': 'artist_and_album_search_{timestamp}.log',
+    'watch': 'watch_lists_{timestamp}.log',
+}
+
+
+def add_settings_arguments(parser, settings_class):
+    """Add an option for every field of a settings dataclass, e.g. --get-max for get_max."""
+    for field in dataclasses.fields(settings_class):
+        option = '--' + field.name.replace('_', '-')
+        if field.type is bool:
+            parser.add_argument(option, action=argparse.BooleanOptionalAction, default=field.default, help="default: %(default)s")
+        else:
+            parser.add_argument(option, type=field.type, default=field.default, help="default: %(default)s")
+
+
+def settings_from_args(args, settings_class):
+    return settings_class(**{field.name: getattr(args, field.name) for field in dataclasses.fields(settings_class)})
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--max-workers', type=int, default=MAX_WORKERS, help="Number of artists or albums resolved in parallel")
+    common.add_argument('--initial-requests-per-second', type=float, default=INITIAL_REQUESTS_PER_SECOND, help="Starting request rate, raised while requests succeed and halved on 429 responses")
+    common.add_argument('--max-requests-per-second', type=float, default=MAX_REQUESTS_PER_SECOND, help="Fixed upper bound of the request rate, by default it rises until the API answers with 429")
+    common.add_argument('--metrics', action='store_true', help="Write a JSON report of API calls per endpoint, latencies, retries and phase timings to the logs directory")
+    common.add_argument('--prometheus', metavar='PATH', help="Also write the metrics to this Prometheus textfile")
+
+    artist_options = argparse.ArgumentParser(add_help=False)
+    artist_options.add_argument('--refresh', action='store_true', help="Ignore cached artist searches and top tracks and fetch them again")
+    add_settings_arguments(artist_options, ArtistSettings)
+
+    parser = argparse.ArgumentParser(prog='playlist_creator', description="Create and update Spotify playlists from artist lists and album reviews.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    artists = commands.add_parser('artists', parents=[common, artist_options], help="Create and update playlists from an artist list")
+    artists.add_argument('--list', default=LIST_JSON, help=f"List file to process, a file name in the lists directory or a path such as lists/x.json, defaults to {LIST_JSON}")
+    artists.add_argument('--resume', action='store_true', help="Continue the last run over the list after an interruption, skipping the playlists it finished")
+    artists.add_argument('--incremental', action='store_true', help="Skip playlists whose artists did not change since the last incremental run and only add or remove the tracks of changed artists")
+
+    albums = commands.add_parser('albums', parents=[common], help="Add the albums of a review page, or one album, to a playlist")
+    add_settings_arguments(albums, AlbumSettings)
+
+    watch = commands.add_parser('watch', parents=[common, artist_options], help="Keep playlists in sync with the list files in the lists directory")
+    watch.add_argument('--interval', type=float, default=POLL_INTERVAL, help="Seconds between two checks of the lists directory")
+    watch.add_argument('--once', action='store_true', help="Update the changed lists once and exit, e.g. from cron")
+    return parser
+
+
+def configure_logging(log_dir, command):
+    os.makedirs(log_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(log_dir, LOG_FILES[command].format(timestamp=timestamp))),
+            logging.StreamHandler()  # Optional: Logs to console as well
+        ]
+    )
+
+
+def write_metrics(context, args, log_dir, job):
+    context.log_stats()
+    if context.metrics.enabled:
+        context.metrics.write_json(os.path.join(log_dir, f"metrics_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"))
+    if args.prometheus:
+        context.metrics.write_prometheus(args.prometheus, job=job)
+
+
+def run_artists(args, context):
+    updater = ArtistPlaylistUpdater(context, settings_from_args(args, ArtistSettings))
+    summary = updater.run(args.list, refresh=args.refresh, resume=args.resume, incremental=args.incremental)
+    write_metrics(context, args, args.log_dir, job='by_artist')
+    return 1 if summary['failed_playlists'] else 0
+
+
+def run_albums(args, context):
+    updater = AlbumPlaylistUpdater(context, settings_from_args(args, AlbumSettings))
+    input_mode = input("Enter 'manual' to provide bandname and album, or 'url' to scrape from a website: ").strip().replace('\u200b', '').lower()
+
+    if input_mode == 'manual':
+        user_input = input("Enter bandname and album (separated by a comma): ").strip().replace('\u200b', '')
+        bandname, album = [x.strip().replace('\u200b', '') for x in user_input.split(',', 1)]
+        playlist_name = input("Enter playlist name: ").strip().replace('\u200b', '')
+
+        report = updater.add_album(bandname, album, playlist_name)
+    elif input_mode == 'url':
+        url = input("Enter the URL to scrape: ").strip().replace('\u200b', '')
+        playlist_name = input("Enter playlist name: ").strip().replace('\u200b', '')
+
+        try:
+            report = updater.add_url(url, playlist_name)
+        except Exception as e:
+            logging.error(f"Failed to scrape website: {e}")
+            report = None
+    else:
+        logging.error("Invalid input mode. Please enter 'manual' or 'url'.")
+        report = None
+
+    write_metrics(context, args, args.log_dir, job='by_artist_and_album')
+    return 1 if report and report['failed'] else 0
+
+
+def list_signatures(lists_dir):
+    """Modification time and size of every JSON, JSONL and NDJSON list file, cheap enough to poll without reading the files."""
+    signatures = {}
+    with os.scandir(lists_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(LIST_SUFFIXES):
+                stat = entry.stat()
+                signatures[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+def run_watch(args, context):
+    # One updater and one authenticated client serve every list, for as long as the watcher runs
+    updater = ArtistPlaylistUpdater(context, settings_from_args(args, ArtistSettings))
+    # Every list is checked on start, unchanged playlists are skipped by the incremental run itself
+    synced = {}
+    while True:
+        for list_name, signature in list_signatures(args.lists_dir).items():
+            if synced.get(list_name) == signature:
+                continue
+            logging.info(f"List '{list_name}' changed, updating its playlists...")
+            try:
+                summary = updater.run(os.path.join(args.lists_dir, list_name), refresh=args.refresh, incremental=True)
+            except Exception:
+                logging.exception(f"Updating '{list_name}' failed, retrying on the next check.")
+                continue
+            write_metrics(context, args, args.log_dir, job='watch_lists')
+            if summary['failed_playlists']:
+                logging.error(f"Updating '{list_name}' left tracks unwritten, retrying on the next check.")
+                continue
+            synced[list_name] = signature
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+COMMANDS = {
+    'artists': run_artists,
+    'albums': run_albums,
+    'watch': run_watch,
+}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_logging(args.log_dir, args.command)
+
+    # Load environment variables from the .env file
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    context = SpotifyContext.from_env(
+        max_workers=args.max_workers,
+        initial_requests_per_second=args.initial_requests_per_second,
+        max_requests_per_second=args.max_requests_per_second,
+        metrics=Metrics(enabled=args.metrics or bool(args.prometheus))
+    )
+    try:
+        return COMMANDS[args.command](args, context)
+    finally:
+        context.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
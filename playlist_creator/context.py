@@ -0,0 +1,126 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .metrics import Metrics
+from .request_scheduler import RequestScheduler, ScheduledClient
+from .spotify_client import IDEMPOTENT_METHODS, create_spotify_client
+from .write_queue import PlaylistWriteQueue
+
+SCOPE = 'playlist-modify-public playlist-modify-private'
+MAX_WORKERS = 8 # Number of artists or albums resolved in parallel
+INITIAL_REQUESTS_PER_SECOND = 20 # Starting request rate, raised while requests succeed and halved on 429 responses
+MAX_REQUESTS_PER_SECOND = None # Optional fixed upper bound of the request rate, by default only 429 responses bound it
+
+
+class SpotifyContext:
+    """
+    Authenticated Spotify client, request scheduler and worker pools shared by any number of jobs.
+
+    Nothing is created until it is first used, so importing the package or building a context
+    makes no requests. A long-lived process keeps one context, so the OAuth token, the HTTP
+    connection pool and the adaptive rate limit carry over from one playlist job to the next.
+    """
+
+    def __init__(self, client_id=None, client_secret=None, redirect_uri=None, scope=SCOPE,
+                 max_workers=MAX_WORKERS, initial_requests_per_second=INITIAL_REQUESTS_PER_SECOND,
+                 max_requests_per_second=MAX_REQUESTS_PER_SECOND, metrics=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.scope = scope
+        self.max_workers = max_workers
+        self.initial_requests_per_second = initial_requests_per_second
+        self.max_requests_per_second = max_requests_per_second
+        # Without metrics no hooks are installed and the phase timers do nothing
+        self.metrics = metrics or Metrics(enabled=False)
+        self._lock = threading.RLock()
+        self._created = {}
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """Context with the CLIENT_ID, CLIENT_SECRET and REDIRECT_URI environment variables as credentials."""
+        return cls(os.getenv("CLIENT_ID"), os.getenv("CLIENT_SECRET"), os.getenv("REDIRECT_URI"), **kwargs)
+
+    def _lazy(self, name, create):
+        created = self._created.get(name)
+        if created is not None:
+            return created
+        # Worker threads may be the first to use the client, so creation is locked
+        with self._lock:
+            if name not in self._created:
+                self._created[name] = create()
+            return self._created[name]
+
+    @property
+    def session(self):
+        return self._lazy('session', self._create_session)
+
+    @property
+    def scheduler(self):
+        return self._lazy('scheduler', self._create_scheduler)
+
+    @property
+    def sp(self):
+        """Spotify client whose calls all go through the scheduler."""
+        return self._lazy('sp', lambda: ScheduledClient(create_spotify_client(
+            self.client_id, self.client_secret, self.redirect_uri, self.scope, requests_session=self.session
+        ), self.scheduler, IDEMPOTENT_METHODS))
+
+    @property
+    def executor(self):
+        return self._lazy('executor', lambda: ThreadPoolExecutor(max_workers=self.max_workers))
+
+    @property
+    def page_executor(self):
+        # Search pages are fetched in their own pool so nested waits cannot starve the workers
+        return self._lazy('page_executor', lambda: ThreadPoolExecutor(max_workers=self.max_workers))
+
+    @property
+    def write_queue(self):
+        """Write-behind queue for the tracks added to playlists."""
+        return self._lazy('write_queue', lambda: PlaylistWriteQueue(self.sp, self.scheduler))
+
+    def user_id(self):
+        # Only looked up when a playlist has to be found or created, so a run without changes makes no API calls
+        return self._lazy('user_id', lambda: self.sp.me()['id'])
+
+    def _create_session(self):
+        # requests is only imported once the first request is made
+        import requests
+
+        # Retries and 429 handling are done by the shared scheduler instead of the spotipy session,
+        # so the session only needs a connection pool large enough for all workers
+        session = requests.Session()
+        session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=self.max_workers))
+        session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=self.max_workers))
+        self.metrics.instrument(session)
+        return session
+
+    def _create_scheduler(self):
+        import requests
+
+        scheduler = RequestScheduler(
+            initial_rate=self.initial_requests_per_second,
+            max_rate=self.max_requests_per_second,
+            burst=self.max_workers,
+            transient_errors=(requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+        )
+        self.metrics.add_scheduler(scheduler)
+        return scheduler
+
+    def log_stats(self):
+        if 'scheduler' in self._created:
+            self.scheduler.log_stats()
+
+    def close(self):
+        """Shut down the worker pools and the connection pool, a later job creates them again."""
+        with self._lock:
+            created, self._created = self._created, {}
+        if 'write_queue' in created:
+            created['write_queue'].close()
+        for name in ('executor', 'page_executor'):
+            if name in created:
+                created[name].shutdown()
+        if 'session' in created:
+            created['session'].close()
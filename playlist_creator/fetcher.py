@@ -0,0 +1,168 @@
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+TITLE_PATTERN = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+# Attributes before the one we look for, quoted values may contain '>'
+ATTRIBUTES = r"""(?:\s+[^\s=>]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'>]+))?)*?"""
+
+
+class Document:
+    """
+    A fetched page, shared by the site extractors.
+
+    Nothing is parsed up front: attribute values are read with a regex scan over the markup,
+    and soup() only builds the elements a SoupStrainer selects, once per selection.
+    """
+
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text
+        self._soups = {}
+
+    def attribute_values(self, tag, attribute):
+        """Unescaped values of attribute on every <tag> element, in document order."""
+        pattern = re.compile(rf"""<{tag}{ATTRIBUTES}\s+{attribute}\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+        return [html.unescape(next(value for value in match.groups() if value is not None)) for match in pattern.finditer(self.text)]
+
+    def title(self):
+        match = TITLE_PATTERN.search(self.text)
+        return html.unescape(match.group(1)).strip() if match else ''
+
+    def soup(self, name=None, **attrs):
+        """Parse only the elements matching SoupStrainer(name, **attrs) and their children."""
+        key = (name, tuple(sorted(attrs.items())))
+        if key not in self._soups:
+            # bs4 is only imported by the extractors that need a parsed tree
+            from bs4 import BeautifulSoup, SoupStrainer
+            self._soups[key] = BeautifulSoup(self.text, 'html.parser', parse_only=SoupStrainer(name, **attrs))
+        return self._soups[key]
+
+
+class Fetcher:
+    """
+    Pooled HTTP fetcher for scraping.
+
+    Requests share one keep-alive session, run concurrently up to max_workers but at most
+    per_host at a time against the same host (spaced by min_interval seconds), and responses
+    are cached on disk and revalidated with If-None-Match / If-Modified-Since.
+    """
+
+    def __init__(self, cache_dir=None, max_workers=8, per_host=4, min_interval=0.0, timeout=10):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_received = 0
+        self._hosts = {}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _host_slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = {'semaphore': threading.Semaphore(self.per_host), 'next': 0.0, 'lock': threading.Lock()}
+            return self._hosts[host]
+
+    def _wait_turn(self, slot):
+        with slot['lock']:
+            now = time.monotonic()
+            wait = slot['next'] - now
+            slot['next'] = max(now, slot['next']) + self.min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def _cache_paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+
+    def _load(self, url):
+        if not self.cache_dir:
+            return None, None
+        meta_path, body_path = self._cache_paths(url)
+        try:
+            with open(meta_path, "r") as file:
+                meta = json.load(file)
+            with open(body_path, "rb") as file:
+                return meta, file.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def _store(self, url, response):
+        if not self.cache_dir:
+            return
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'encoding': response.encoding or response.apparent_encoding,
+        }
+        if not meta['etag'] and not meta['last_modified']:
+            return  # Nothing to revalidate with, so caching would only risk stale pages
+        meta_path, body_path = self._cache_paths(url)
+        with open(body_path, "wb") as file:
+            file.write(response.content)
+        with open(meta_path, "w") as file:
+            json.dump(meta, file)
+
+    def fetch(self, url):
+        """Return the text of url, from the disk cache if the server confirms it is unchanged."""
+        meta, body = self._load(url)
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        slot = self._host_slot(url)
+        with slot['semaphore']:
+            self._wait_turn(slot)
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += len(response.content)
+
+        if response.status_code == 304 and body is not None:
+            with self._lock:
+                self.not_modified += 1
+            return body.decode(meta.get('encoding') or 'utf-8', errors='replace')
+        response.raise_for_status()
+        self._store(url, response)
+        return response.text
+
+    def fetch_all(self, urls):
+        """Fetch all urls concurrently and return their texts in the same order."""
+        if len(urls) <= 1:
+            return [self.fetch(url) for url in urls]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            return list(executor.map(self.fetch, urls))
+
+    def document(self, url):
+        return Document(url, self.fetch(url))
+
+    def documents(self, urls):
+        """Fetch every distinct url once, concurrently, and return the documents in order of first appearance."""
+        urls = list(dict.fromkeys(urls))
+        return [Document(url, text) for url, text in zip(urls, self.fetch_all(urls))]
+
+    def log_stats(self):
+        logging.info(f"Fetched {self.requests} pages ({self.not_modified} unchanged since the last scrape, {self.bytes_received} bytes received)")
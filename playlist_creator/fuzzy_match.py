@@ -0,0 +1,98 @@
+import re
+
+
+class BKTree:
+    """Burkhard-Keller tree over strings for nearest neighbour queries by edit distance."""
+
+    def __init__(self, distance=None):
+        if distance is None:
+            # Imported on first use, most runs never build a tree
+            import Levenshtein
+            distance = Levenshtein.distance
+        self.distance = distance
+        self.root = None
+
+    def add(self, key, item):
+        if self.root is None:
+            self.root = (key, [item], {})
+            return
+        node = self.root
+        while True:
+            node_key, items, children = node
+            d = self.distance(key, node_key)
+            if d == 0:
+                items.append(item)
+                return
+            if d not in children:
+                children[d] = (key, [item], {})
+                return
+            node = children[d]
+
+    def search(self, query, max_distance):
+        """Return (distance, key, items) of all keys within max_distance of query."""
+        found = []
+        nodes = [self.root] if self.root else []
+        while nodes:
+            node_key, items, children = nodes.pop()
+            d = self.distance(query, node_key)
+            if d <= max_distance:
+                found.append((d, node_key, items))
+            # Only subtrees within max_distance of d can contain matches (triangle inequality)
+            for child_distance, child in children.items():
+                if d - max_distance <= child_distance <= d + max_distance:
+                    nodes.append(child)
+        return found
+
+
+def rank_approximate_matches(query, candidates, max_distance, min_score, normalize):
+    """
+    Rank candidates whose normalized name is within max_distance edits of query.
+
+    Returns (candidate, distance, score) tuples ordered by distance, similarity score and popularity,
+    where score is the normalized similarity (1.0 for identical names) and must be at least min_score.
+    """
+    import Levenshtein
+
+    tree = BKTree()
+    seen = set()
+    for candidate in candidates:
+        # The same artist can show up on several result pages
+        if candidate['id'] not in seen:
+            seen.add(candidate['id'])
+            tree.add(normalize(candidate['name']), candidate)
+    ranked = []
+    for distance, key, items in tree.search(query, max_distance):
+        score = Levenshtein.ratio(query, key)
+        if score >= min_score:
+            ranked.extend((item, distance, score) for item in items)
+    ranked.sort(key=lambda match: (match[1], -match[2], -(match[0].get('popularity') or 0)))
+    return ranked
+
+
+class ArtistAliases:
+    """
+    Local alias dictionary for messy lineup names.
+
+    aliases maps normalized names to the name to search for instead, patterns strip suffixes
+    like '(Live)' or 'feat. X', and artist_ids maps normalized names straight to Spotify
+    artist IDs so they resolve without any search call.
+    """
+
+    def __init__(self, aliases=None, artist_ids=None, patterns=None, normalize=str.lower):
+        self.normalize = normalize
+        self.aliases = {normalize(name): normalize(alias) for name, alias in (aliases or {}).items()}
+        self.artist_ids = {normalize(name): artist_id for name, artist_id in (artist_ids or {}).items()}
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in (patterns or [])]
+
+    def canonical(self, normalized_name):
+        """Return the normalized name an artist should be resolved as."""
+        if normalized_name in self.aliases:
+            return self.aliases[normalized_name]
+        name = normalized_name
+        for pattern in self.patterns:
+            name = pattern.sub('', name).strip()
+        name = name or normalized_name
+        return self.aliases.get(name, name)
+
+    def artist_id(self, normalized_name):
+        return self.artist_ids.get(normalized_name)
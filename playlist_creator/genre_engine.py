@@ -0,0 +1,93 @@
+import math
+import re
+from collections import Counter
+
+
+class GenreEngine:
+    """
+    Normalizes and interns genres and scores ambiguous artist matches against playlist genre profiles.
+
+    The country prefix pattern is compiled once and every normalized genre gets a stable integer ID,
+    so profiles and candidates can be compared as vectors.
+    """
+
+    def __init__(self, country_prefixes):
+        # Match any of the country prefixes followed by a space
+        self.prefix_pattern = re.compile(rf"^({'|'.join(re.escape(prefix) for prefix in country_prefixes)})\s+", re.IGNORECASE)
+        self.genre_ids = {}
+        # Number of resolved artists per genre ID over all playlists of the run
+        self.document_frequency = Counter()
+        self.documents = 0
+
+    def normalize(self, genres):
+        """Strip country prefixes, e.g. 'swedish doom metal' -> 'doom metal'."""
+        return [self.prefix_pattern.sub('', genre).strip().lower() for genre in genres]
+
+    def intern(self, genres):
+        """Return the set of genre IDs of the normalized genres."""
+        ids = set()
+        for genre in self.normalize(genres):
+            ids.add(self.genre_ids.setdefault(genre, len(self.genre_ids)))
+        return ids
+
+    def add_document(self, genre_ids):
+        self.document_frequency.update(genre_ids)
+        self.documents += 1
+
+    def idf(self, genre_id):
+        # Genres shared by nearly every resolved artist say little about which candidate fits
+        return math.log((1 + self.documents) / (1 + self.document_frequency[genre_id])) + 1
+
+    def score(self, groups):
+        """
+        Score every candidate of every ambiguous artist in one batch.
+
+        groups is a list of (candidates, profile) pairs. Returns one array of cosine similarities
+        between each candidate's genres and the TF-IDF weighted profile per group.
+        """
+        # numpy is only needed once an artist turns out to be ambiguous
+        import numpy as np
+
+        rows = [(group_index, self.intern(candidate['genres'])) for group_index, (candidates, _) in enumerate(groups) for candidate in candidates]
+        width = len(self.genre_ids)
+        candidate_matrix = np.zeros((len(rows), width))
+        for row, (_, genre_ids) in enumerate(rows):
+            candidate_matrix[row, list(genre_ids)] = 1.0
+        profile_matrix = np.vstack([profile.weights(width) for _, profile in groups]) if groups else np.zeros((0, width))
+        profile_rows = profile_matrix[[group_index for group_index, _ in rows]] if rows else np.zeros((0, width))
+
+        dot = np.einsum('ij,ij->i', candidate_matrix, profile_rows)
+        norms = np.linalg.norm(candidate_matrix, axis=1) * np.linalg.norm(profile_rows, axis=1)
+        scores = np.divide(dot, norms, out=np.zeros_like(dot), where=norms > 0)
+
+        # Split the flat score array back into one array per group
+        bounds = np.cumsum([0] + [len(candidates) for candidates, _ in groups])
+        return [scores[bounds[i]:bounds[i + 1]] for i in range(len(groups))]
+
+
+class GenreProfile:
+    """Genre frequencies of the artists resolved for a playlist, updated as artists resolve."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.counts = Counter()
+        self.artists = 0
+
+    def add(self, genres):
+        genre_ids = self.engine.intern(genres)
+        self.engine.add_document(genre_ids)
+        self.counts.update(genre_ids)
+        self.artists += 1
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.artists += other.artists
+
+    def weights(self, width):
+        """TF-IDF weight vector over all genre IDs known to the engine."""
+        import numpy as np
+
+        vector = np.zeros(width)
+        for genre_id, count in self.counts.items():
+            vector[genre_id] = count / self.artists * self.engine.idf(genre_id)
+        return vector
@@ -0,0 +1,63 @@
+import json
+
+STREAMED_SUFFIXES = ('.jsonl', '.ndjson') # List files read line by line
+LIST_SUFFIXES = ('.json',) + STREAMED_SUFFIXES # Every list file format iter_playlists reads
+
+def iter_playlists(path):
+    """
+    Yield the playlists of a list file one at a time.
+
+    .json files use the {"playlists": [...]} format and are loaded whole. .jsonl and .ndjson
+    files are streamed line by line, where a line is either a whole playlist
+    ({"playlistName": ..., "artists": [...]}) or a single artist ({"playlistName": ..., "artist": ...});
+    consecutive artist lines of the same playlist are grouped into one playlist. The lines of a
+    playlist have to be grouped together: a ValueError names the line on which a playlist
+    reappears after another one.
+    """
+    if not path.endswith(STREAMED_SUFFIXES):
+        with open(path, "r") as file:
+            yield from json.load(file)["playlists"]
+        return
+
+    current = None
+    emitted = set() # Names of the playlists already yielded
+    with open(path, "r") as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number} of '{path}': {e}") from e
+            if 'artist' in entry and current and current['playlistName'] == entry['playlistName']:
+                current['artists'].append(entry['artist'])
+                continue
+            if current:
+                emitted.add(current['playlistName'])
+            # A playlist split over two runs of lines would be updated twice, each time with half of its artists
+            if entry['playlistName'] in emitted:
+                raise ValueError(f"Playlist '{entry['playlistName']}' is listed again on line {line_number} of '{path}', the lines of a playlist have to be next to each other")
+            if 'artist' in entry:
+                playlist = {'playlistName': entry['playlistName'], 'artists': [entry['artist']]}
+            else:
+                playlist = {'playlistName': entry['playlistName'], 'artists': list(entry['artists'])}
+            if current:
+                yield current
+            current = playlist
+    if current:
+        yield current
+
+
+def batch_playlists(playlists, max_artists):
+    """Group playlists into batches of about max_artists artists, never splitting a playlist."""
+    batch = []
+    artists = 0
+    for playlist in playlists:
+        batch.append(playlist)
+        artists += len(playlist['artists'])
+        if artists >= max_artists:
+            yield batch
+            batch = []
+            artists = 0
+    if batch:
+        yield batch
@@ -0,0 +1,158 @@
+import contextlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def spotify_endpoint(request):
+    """Group API requests by endpoint, e.g. 'GET /v1/artists/{id}/top-tracks'."""
+    path = urlparse(request.url).path.rstrip('/')
+    path = re.sub(r'/[0-9A-Za-z]{22}(?=/|$)', '/{id}', path)
+    path = re.sub(r'/users/[^/]+', '/users/{id}', path)
+    return f"{request.method} {path}"
+
+
+def host_endpoint(request):
+    """Group scraper requests by host, e.g. 'GET bandcamp.com'."""
+    return f"{request.method} {urlparse(request.url).netloc}"
+
+
+class Metrics:
+    """
+    Call counts, latency histograms, status codes and bytes per endpoint, plus timings per phase of a run.
+
+    Requests are recorded by a response hook on the requests sessions passed to instrument().
+    A disabled instance installs no hooks and phase() does nothing, so it costs nothing to keep around.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self.endpoints = defaultdict(lambda: {
+            'calls': 0,
+            'status': defaultdict(int),
+            'bytes_sent': 0,
+            'bytes_received': 0,
+            'latency_sum': 0.0,
+            'latency_max': 0.0,
+            'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+        })
+        self.phases = defaultdict(lambda: {'seconds': 0.0, 'count': 0})
+        self.schedulers = []
+        self._lock = threading.Lock()
+
+    def instrument(self, session, endpoint=spotify_endpoint):
+        """Record every response of a requests session under the endpoint name returned by endpoint(request)."""
+        if not self.enabled:
+            return session
+
+        def record(response, *args, **kwargs):
+            self.record_request(endpoint(response.request), response.elapsed.total_seconds(), response.status_code,
+                                len(response.request.body or b''), len(response.content))
+        session.hooks['response'].append(record)
+        return session
+
+    def add_scheduler(self, scheduler):
+        """Include the retry and rate limit counts of a RequestScheduler in the report."""
+        self.schedulers.append(scheduler)
+
+    def record_request(self, endpoint, seconds, status, bytes_sent, bytes_received):
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        with self._lock:
+            stats = self.endpoints[endpoint]
+            stats['calls'] += 1
+            stats['status'][str(status)] += 1
+            stats['bytes_sent'] += bytes_sent
+            stats['bytes_received'] += bytes_received
+            stats['latency_sum'] += seconds
+            stats['latency_max'] = max(stats['latency_max'], seconds)
+            stats['latency_buckets'][bucket] += 1
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Add the time spent in the with block to the phase, e.g. 'resolve' or 'write'."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name]['seconds'] += time.perf_counter() - start
+                self.phases[name]['count'] += 1
+
+    def report(self):
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in sorted(self.endpoints.items()):
+                # Cumulative like Prometheus histograms: requests at or below each bound
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip([str(bound) for bound in LATENCY_BUCKETS] + ['+Inf'], stats['latency_buckets']):
+                    cumulative += count
+                    buckets[bound] = cumulative
+                endpoints[endpoint] = {
+                    'calls': stats['calls'],
+                    'status': dict(sorted(stats['status'].items())),
+                    'rate_limited': stats['status'].get('429', 0),
+                    'bytes_sent': stats['bytes_sent'],
+                    'bytes_received': stats['bytes_received'],
+                    'latency': {'sum': round(stats['latency_sum'], 6), 'max': round(stats['latency_max'], 6), 'buckets': buckets},
+                }
+            return {
+                'started_at': self.started_at,
+                'duration': round(time.time() - self.started_at, 3),
+                'calls': sum(stats['calls'] for stats in endpoints.values()),
+                'rate_limited': sum(stats['rate_limited'] for stats in endpoints.values()),
+                'retries': sum(scheduler.retries for scheduler in self.schedulers),
+                'bytes_received': sum(stats['bytes_received'] for stats in endpoints.values()),
+                'endpoints': endpoints,
+                'phases': {name: {'seconds': round(phase['seconds'], 3), 'count': phase['count']} for name, phase in self.phases.items()},
+            }
+
+    def write_json(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=4)
+        logging.info(f"Wrote the metrics report to '{path}'.")
+
+    def write_prometheus(self, path, job):
+        """Write the report in the Prometheus text format, e.g. for the node exporter textfile collector."""
+        report = self.report()
+        endpoint_labels = {endpoint: 'job="{}",method="{}",endpoint="{}"'.format(job, *endpoint.split(" ", 1)) for endpoint in report['endpoints']}
+        # Samples of one metric have to be grouped under its TYPE line
+        lines = ["# TYPE playlist_creator_requests_total counter"]
+        for endpoint, stats in report['endpoints'].items():
+            for status, count in stats['status'].items():
+                lines.append(f'playlist_creator_requests_total{{{endpoint_labels[endpoint]},status="{status}"}} {count}')
+        lines.append("# TYPE playlist_creator_received_bytes_total counter")
+        for endpoint, stats in report['endpoints'].items():
+            lines.append(f"playlist_creator_received_bytes_total{{{endpoint_labels[endpoint]}}} {stats['bytes_received']}")
+        lines.append("# TYPE playlist_creator_request_duration_seconds histogram")
+        for endpoint, stats in report['endpoints'].items():
+            for bound, count in stats['latency']['buckets'].items():
+                lines.append(f'playlist_creator_request_duration_seconds_bucket{{{endpoint_labels[endpoint]},le="{bound}"}} {count}')
+            lines.append(f"playlist_creator_request_duration_seconds_sum{{{endpoint_labels[endpoint]}}} {stats['latency']['sum']}")
+            lines.append(f"playlist_creator_request_duration_seconds_count{{{endpoint_labels[endpoint]}}} {stats['calls']}")
+        lines.append("# TYPE playlist_creator_phase_seconds gauge")
+        for name, phase in report['phases'].items():
+            lines.append(f'playlist_creator_phase_seconds{{job="{job}",phase="{name}"}} {phase["seconds"]}')
+        lines.append("# TYPE playlist_creator_retries gauge")
+        lines.append(f'playlist_creator_retries{{job="{job}"}} {report["retries"]}')
+        lines.append("# TYPE playlist_creator_run_duration_seconds gauge")
+        lines.append(f'playlist_creator_run_duration_seconds{{job="{job}"}} {report["duration"]}')
+
+        # The textfile collector may read at any time, so replace the file in one step
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(f"{path}.tmp", "w") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(f"{path}.tmp", path)
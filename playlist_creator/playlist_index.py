@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+
+
+class UserPlaylistIndex:
+    """
+    Index of the current user's playlists, mapping case-folded name to playlist ID.
+
+    The playlist list is fetched at most once per run. With a cache_path the index is
+    also persisted between runs, but a persisted entry is never trusted on its own: the
+    playlist may have been renamed or deleted since, so the index is fetched again once
+    per run before the first lookup.
+    """
+
+    def __init__(self, sp, cache_path=None):
+        self.sp = sp
+        self.cache_path = cache_path
+        self._index = None
+        self._fetched = False
+
+    def _fetch(self):
+        index = {}
+        playlists = self.sp.current_user_playlists(limit=50)
+        while playlists:
+            for playlist in playlists['items']:
+                # Keep the first playlist of a name, like the earlier page-through lookup did
+                index.setdefault(playlist['name'].casefold(), playlist['id'])
+            playlists = self.sp.next(playlists) if playlists['next'] else None
+        self._index = index
+        self._fetched = True
+        logging.info(f"Indexed {len(index)} user playlists.")
+        self._save()
+
+    def _load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, "r") as file:
+                self._index = json.load(file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable playlist index '{self.cache_path}': {e}")
+            return False
+        return True
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        with open(self.cache_path, "w") as file:
+            json.dump(self._index, file)
+
+    def get(self, playlist_name):
+        """Return the ID of the playlist with this name or None."""
+        if not self._fetched:
+            # A persisted index may still list renamed or deleted playlists, refresh it once for this run
+            self._fetch()
+        return self._index.get(playlist_name.casefold())
+
+    def create(self, user_id, playlist_name, description, scheduler, max_attempts=3):
+        """
+        Create a public playlist, record it and return the created playlist.
+
+        A create that failed without telling whether it was applied is only repeated once a fresh
+        fetch of the user's playlists shows that it was not; a playlist found by that fetch is
+        returned without a snapshot_id.
+        """
+        for attempt in range(max_attempts):
+            try:
+                playlist = self.sp.user_playlist_create(user=user_id, name=playlist_name, public=True, description=description)
+            except Exception as e:
+                if not scheduler.is_transient(e) or attempt + 1 == max_attempts:
+                    raise
+                logging.warning(f"Creating playlist '{playlist_name}' failed ({e}), checking whether it was created...")
+                self._fetch()
+                playlist_id = self._index.get(playlist_name.casefold())
+                if playlist_id:
+                    return {'id': playlist_id, 'snapshot_id': None}
+                continue
+            self.add(playlist_name, playlist['id'])
+            return playlist
+
+    def add(self, playlist_name, playlist_id):
+        """Record a newly created playlist."""
+        if self._index is None and not self._load():
+            self._index = {}
+        self._index[playlist_name.casefold()] = playlist_id
+        self._save()
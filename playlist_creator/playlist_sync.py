@@ -0,0 +1,144 @@
+import logging
+import time
+from bisect import bisect_left
+
+BATCH_SIZE = 100
+MAX_WRITE_ATTEMPTS = 4 # Attempts per write when it fails without telling whether it was applied
+
+
+def longest_increasing_subsequence(values):
+    """Return the indices of one longest strictly increasing subsequence of values."""
+    tail_values = []  # tail_values[k] is the smallest tail of an increasing run of length k + 1
+    tail_indices = []
+    previous = [None] * len(values)
+    for i, value in enumerate(values):
+        k = bisect_left(tail_values, value)
+        if k > 0:
+            previous[i] = tail_indices[k - 1]
+        if k == len(tail_values):
+            tail_values.append(value)
+            tail_indices.append(i)
+        else:
+            tail_values[k] = value
+            tail_indices[k] = i
+    indices = set()
+    i = tail_indices[-1] if tail_indices else None
+    while i is not None:
+        indices.add(i)
+        i = previous[i]
+    return indices
+
+
+def diff_playlist(current, desired):
+    """
+    Compute the writes that turn the current ordered URI list into the desired one.
+
+    Returns (removals, moves, additions), to be applied in that order:
+        removals: (uri, position) pairs of the current list, highest position first
+        moves: (range_start, insert_before) pairs of single track reorders
+        additions: (position, uris) inserts of at most BATCH_SIZE tracks
+    Tracks that only changed their position are moved instead of being removed and re-added,
+    so they keep their added_at date.
+    """
+    desired = list(dict.fromkeys(desired))
+    desired_index = {uri: i for i, uri in enumerate(desired)}
+
+    # Drop tracks that are no longer wanted and repeated occurrences of kept tracks
+    removals = []
+    kept = []
+    kept_set = set()
+    for position, uri in enumerate(current):
+        if uri in desired_index and uri not in kept_set:
+            kept.append(uri)
+            kept_set.add(uri)
+        else:
+            removals.append((uri, position))
+    removals.reverse()
+
+    # Tracks on a longest run of increasing desired positions stay where they are,
+    # every other kept track is moved right behind its predecessor in the desired order
+    staying = {kept[i] for i in longest_increasing_subsequence([desired_index[uri] for uri in kept])}
+    ordered_kept = [uri for uri in desired if uri in kept_set]
+    working = list(kept)
+    moves = []
+    for t, uri in enumerate(ordered_kept):
+        if uri in staying:
+            continue
+        start = working.index(uri)
+        insert_before = working.index(ordered_kept[t - 1]) + 1 if t > 0 else 0
+        if start == insert_before:
+            continue
+        moves.append((start, insert_before))
+        working.pop(start)
+        working.insert(insert_before - 1 if start < insert_before else insert_before, uri)
+
+    # Insert the new tracks in runs, from the start of the playlist to its end
+    additions = []
+    run_start = None
+    for position, uri in enumerate(desired + [None]):
+        if uri is not None and uri not in kept_set:
+            if run_start is None:
+                run_start = position
+            continue
+        if run_start is not None:
+            run = desired[run_start:position]
+            for i in range(0, len(run), BATCH_SIZE):
+                additions.append((run_start + i, run[i:i + BATCH_SIZE]))
+            run_start = None
+    return removals, moves, additions
+
+
+def checked_write(sp, scheduler, playlist_id, snapshot_id, write, applied=None, max_attempts=MAX_WRITE_ATTEMPTS):
+    """
+    Run a playlist write that must not be repeated blindly and return the playlist's new snapshot_id.
+
+    After a failure that may or may not have been applied, an unchanged snapshot_id shows that
+    nothing was written and the write is repeated; a changed one counts as applied unless
+    applied() finds the playlist does not match the write.
+    """
+    for attempt in range(max_attempts):
+        try:
+            return write()['snapshot_id']
+        except Exception as e:
+            if not scheduler.is_transient(e) or attempt + 1 == max_attempts:
+                raise
+            logging.warning(f"Writing to playlist {playlist_id} failed ({e}), checking whether it was applied...")
+            current_snapshot_id = sp.playlist(playlist_id, fields="snapshot_id")['snapshot_id']
+            if current_snapshot_id != snapshot_id and (applied is None or applied()):
+                return current_snapshot_id
+            snapshot_id = current_snapshot_id
+            time.sleep(scheduler.backoff_factor * 2 ** attempt)
+
+
+def apply_playlist_diff(sp, scheduler, playlist_id, snapshot_id, removals, moves, additions):
+    """
+    Apply the writes computed by diff_playlist, each guarded by the snapshot_id of the previous one.
+
+    Every write is sent at most once and only repeated after checked_write found it was not applied.
+    Returns the number of write calls and the final snapshot_id.
+    """
+    writer = sp.at_most_once
+    write_calls = 0
+    # Removals run from the end of the playlist, so the positions of earlier tracks stay valid
+    for i in range(0, len(removals), BATCH_SIZE):
+        items = {}
+        for uri, position in removals[i:i + BATCH_SIZE]:
+            items.setdefault(uri, []).append(position)
+        items = [{'uri': uri, 'positions': positions} for uri, positions in items.items()]
+        snapshot_id = checked_write(sp, scheduler, playlist_id, snapshot_id, lambda: writer.playlist_remove_specific_occurrences_of_items(
+            playlist_id, items, snapshot_id=snapshot_id
+        ))
+        write_calls += 1
+    for range_start, insert_before in moves:
+        snapshot_id = checked_write(sp, scheduler, playlist_id, snapshot_id, lambda: writer.playlist_reorder_items(
+            playlist_id, range_start=range_start, insert_before=insert_before, snapshot_id=snapshot_id
+        ))
+        write_calls += 1
+    for position, uris in additions:
+        # Additions are not guarded by a snapshot_id, so the tracks at their position show whether they were inserted
+        def inserted():
+            items = sp.playlist_items(playlist_id, fields="items(track(uri))", limit=len(uris), offset=position)['items']
+            return [item['track']['uri'] if item.get('track') else None for item in items] == uris
+        snapshot_id = checked_write(sp, scheduler, playlist_id, snapshot_id, lambda: writer.playlist_add_items(playlist_id, uris, position=position), inserted)
+        write_calls += 1
+    return write_calls, snapshot_id
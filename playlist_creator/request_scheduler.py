@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+
+# HTTP status codes that are worth retrying after a short backoff
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+def error_status(error):
+    """Return (status code, Retry-After seconds) of a failed request, or (None, None) if unknown."""
+    status = getattr(error, 'http_status', None)
+    headers = getattr(error, 'headers', None)
+    response = getattr(error, 'response', None)
+    if status is None and response is not None:
+        status = response.status_code
+        headers = response.headers
+    retry_after = None
+    if headers and headers.get('Retry-After') is not None:
+        try:
+            retry_after = float(headers.get('Retry-After'))
+        except ValueError:
+            retry_after = None
+    return status, retry_after
+
+
+class RequestScheduler:
+    """
+    Token bucket shared by all threads issuing API requests.
+
+    The rate starts at initial_rate. A 429 response pauses every caller for the Retry-After
+    interval and halves the rate; every successful request that had to wait for a token raises
+    it by rate_step, so the rate probes upward until the API pushes back again. max_rate is an
+    optional fixed upper bound.
+    """
+
+    def __init__(self, initial_rate=10.0, max_rate=None, rate_step=0.5, burst=10, min_rate=1.0, max_retries=5, backoff_factor=0.5, transient_errors=()):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate = min(initial_rate, max_rate) if max_rate else initial_rate
+        self.rate_step = rate_step
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.transient_errors = tuple(transient_errors)
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._limited = False # Whether a request had to wait for a token since the rate was last raised
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self.requests += 1
+                        self._local.requests = self.thread_requests() + 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                    self._limited = True
+            time.sleep(wait)
+
+    def thread_requests(self):
+        """Number of requests issued so far by the calling thread."""
+        return getattr(self._local, 'requests', 0)
+
+    def _throttle(self, retry_after):
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._paused_until = max(self._paused_until, now + retry_after)
+            # Drop saved up tokens so the pause is not followed by a burst
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+    def _recover(self):
+        with self._lock:
+            # Only a rate that actually held requests back is raised, so it cannot drift far above the real request rate
+            if self._limited:
+                self._limited = False
+                self.rate = min(self.max_rate, self.rate + self.rate_step) if self.max_rate else self.rate + self.rate_step
+
+    def is_transient(self, error):
+        """Whether a failed request may succeed when repeated; it may or may not have been applied."""
+        status, _ = error_status(error)
+        return status in RETRY_STATUS_CODES or isinstance(error, self.transient_errors)
+
+    def call(self, fn, *args, **kwargs):
+        """Call fn once a token is available, retrying rate limited and transient failures; only for idempotent requests."""
+        return self._call(fn, args, kwargs, retry_transient=True)
+
+    def call_at_most_once(self, fn, *args, **kwargs):
+        """
+        Call fn like call(), but only retry rate limited requests, which the API rejects before applying them.
+
+        For writes that must not be repeated blindly: a transient failure is raised to the caller,
+        which has to check whether the write was applied before repeating it.
+        """
+        return self._call(fn, args, kwargs, retry_transient=False)
+
+    def _call(self, fn, args, kwargs, retry_transient):
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                status, retry_after = error_status(e)
+                if attempt >= self.max_retries:
+                    raise
+                if status == 429:
+                    wait = retry_after if retry_after is not None else self.backoff_factor * 2 ** attempt
+                    logging.warning(f"Rate limited by the API, pausing requests for {wait:.1f}s")
+                    self._throttle(wait)
+                elif retry_transient and self.is_transient(e):
+                    time.sleep(self.backoff_factor * 2 ** attempt)
+                else:
+                    raise
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                continue
+            self._recover()
+            return result
+
+    def log_stats(self):
+        logging.info(f"Scheduler: {self.requests} requests, {self.throttled} rate limited, {self.retries} retries, final rate {self.rate:.1f}/s")
+
+
+class ScheduledClient:
+    """
+    Proxy that routes every method call of a client (e.g. spotipy.Spotify) through a RequestScheduler.
+
+    Only the methods named in idempotent_methods are retried on transient failures, every other
+    call (and every call through at_most_once) is only retried when rate limited, so a write whose
+    response got lost is never repeated blindly.
+    """
+
+    def __init__(self, client, scheduler, idempotent_methods=frozenset(), at_most_once=False):
+        self._client = client
+        self._scheduler = scheduler
+        self._idempotent_methods = frozenset() if at_most_once else frozenset(idempotent_methods)
+
+    @property
+    def at_most_once(self):
+        return ScheduledClient(self._client, self._scheduler, at_most_once=True)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        call = self._scheduler.call if name in self._idempotent_methods else self._scheduler.call_at_most_once
+
+        def scheduled(*args, **kwargs):
+            return call(attr, *args, **kwargs)
+        return scheduled
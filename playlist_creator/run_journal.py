@@ -0,0 +1,71 @@
+import json
+import logging
+import os
+import time
+
+
+class RunJournal:
+    """
+    Append-only JSONL journal of a run over a list file, so an interrupted run can be resumed.
+
+    Playlists are processed in list order; the journal records when the run started, every
+    playlist that was cleared and every playlist whose tracks were fully written. A resumed
+    run skips the completed playlists and does not clear a playlist a second time.
+    """
+
+    def __init__(self, path, list_path, resume=False):
+        self.path = path
+        self.list_path = list_path
+        self.started_at = time.time()
+        self.completed = 0 # Number of playlists at the start of the list that are done
+        self.cleared = set()
+        self.resumed = resume and self._load()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, "a" if self.resumed else "w")
+        if self.resumed:
+            logging.info(f"Resuming the run started at {time.ctime(self.started_at)}, skipping {self.completed} finished playlists.")
+        else:
+            self._write({'event': 'start', 'list': list_path, 'list_signature': self._list_signature(), 'started_at': self.started_at})
+
+    def _list_signature(self):
+        stat = os.stat(self.list_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            logging.warning(f"No journal to resume from at '{self.path}', starting from the beginning.")
+            return False
+        with open(self.path, "r") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break # The last line may be cut off by the interruption
+                if record['event'] == 'start':
+                    if record['list'] != self.list_path or record['list_signature'] != self._list_signature():
+                        logging.warning(f"The journal belongs to another version of the list, starting from the beginning.")
+                        return False
+                    self.started_at = record['started_at']
+                elif record['event'] == 'cleared':
+                    self.cleared.add(record['index'])
+                elif record['event'] == 'done':
+                    self.completed = record['index'] + 1
+                    self.cleared.discard(record['index'])
+        return True
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def playlist_cleared(self, index):
+        self.cleared.add(index)
+        self._write({'event': 'cleared', 'index': index})
+
+    def playlist_done(self, index):
+        self.completed = index + 1
+        self.cleared.discard(index)
+        self._write({'event': 'done', 'index': index})
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,58 @@
+import os
+from dataclasses import dataclass
+
+HELPER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'helpers')
+
+
+@dataclass
+class ArtistSettings:
+    """Configuration of an ArtistPlaylistUpdater, every field is also a command line option of the artists command."""
+
+    lists_dir: str = "./lists"
+    log_dir: str = "./logs"
+    cache_dir: str = "./cache"
+    helper_dir: str = HELPER_DIR
+    country_prefixes_json: str = "country_prefixes.json" # Replace with your own JSON file
+    artist_aliases_json: str = "artist_aliases.json" # Aliases, suffix patterns and fixed artist IDs for lineup names
+    artist_cache_db: str = "artist_cache.sqlite"
+    # Cached artist searches and top tracks are reused until they are older than these TTLs (seconds)
+    search_cache_ttl: int = 7 * 24 * 3600
+    top_tracks_cache_ttl: int = 24 * 3600
+    cache_max_entries: int = 20000 # Least recently used entries are evicted above this size per table
+    playlist_index_json: str = "user_playlists_{user_id}.json"
+    persist_playlist_index: bool = False # Also save the name to ID index of your playlists to cache_dir, it is still refreshed once per run before it is used
+    sync_state_json: str = "sync_state.json" # Artist lists and added tracks of every playlist as of the last incremental run
+    journal_jsonl: str = "journal_{list_name}.jsonl" # Progress of the last run over a list file, used to resume
+    batch_size: int = 100
+    get_lim: int = 50
+    get_max: int = 150
+    confident_popularity: int = 20 # A single exact match on the first search page with at least this popularity stops paging
+    max_artists_per_batch: int = 1000 # Playlists are read and processed in batches of about this many artists, so memory stays bounded for large lists
+    # Pick the higher popularity or skip on finding duplicate artists
+    pick_higher_popularity: bool = True
+    # Clear playlist before adding new songs
+    clear_playlist: bool = False
+    # Sync existing playlists to the artist list with minimal removes, moves and adds (takes precedence over clear_playlist)
+    sync_playlist: bool = False
+    # Allow approximate matches with distance of up to approx_matches
+    use_lev: bool = False
+    approx_matches: int = 2
+    approx_min_score: float = 0.8 # Minimum normalized similarity (0-1) of an approximate match
+    # Pick the artist that is more similar in genre or skip on finding duplicate artists
+    pick_genre_proximity: bool = True # Only works with larger playlists, genre sometimes not available for smaller artists
+    pick_low_confidence: bool = True # Instead of ignoring results that might be wrong, they are added to be reviewed later
+
+
+@dataclass
+class AlbumSettings:
+    """Configuration of an AlbumPlaylistUpdater, every field is also a command line option of the albums command."""
+
+    log_dir: str = "./logs"
+    cache_dir: str = "./cache"
+    playlist_index_json: str = "user_playlists_{user_id}.json"
+    persist_playlist_index: bool = False # Also save the name to ID index of your playlists to cache_dir, it is still refreshed once per run before it is used
+    albums_per_request: int = 20 # Spotify API limit for fetching several albums at once
+    http_cache_dir: str = "./cache/http" # Scraped pages, revalidated with ETag / Last-Modified on the next run
+    max_fetch_workers: int = 8 # Embedded players fetched at the same time
+    max_requests_per_host: int = 4 # Concurrent requests against one host, e.g. bandcamp.com
+    host_min_interval: float = 0.1 # Minimum seconds between two requests to the same host
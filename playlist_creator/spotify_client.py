@@ -0,0 +1,35 @@
+import os
+
+# Calls that can be repeated after a failure that may or may not have been applied, every other call is sent at most once
+IDEMPOTENT_METHODS = frozenset({
+    'me', 'search', 'artist', 'artist_top_tracks', 'albums', 'next',
+    'playlist', 'playlist_items', 'current_user_playlists',
+    # Writes that leave the playlist in the same state however often they are applied
+    'playlist_change_details', 'playlist_replace_items', 'playlist_remove_all_occurrences_of_items',
+})
+
+def create_spotify_client(client_id, client_secret, redirect_uri, scope, requests_session=True):
+    """
+    Create an authenticated Spotify client.
+
+    The SPOTIFY_ACCESS_TOKEN environment variable replaces the OAuth flow with a fixed token and
+    SPOTIFY_API_PREFIX points the client at another API server, e.g. the local benchmark backend.
+    """
+    # spotipy is only imported once a client is actually needed
+    import spotipy
+    from spotipy.oauth2 import SpotifyOAuth
+
+    access_token = os.getenv("SPOTIFY_ACCESS_TOKEN")
+    if access_token:
+        sp = spotipy.Spotify(auth=access_token, requests_session=requests_session)
+    else:
+        sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
+            client_id=client_id,
+            client_secret=client_secret,
+            redirect_uri=redirect_uri,
+            scope=scope
+        ), requests_session=requests_session)
+    api_prefix = os.getenv("SPOTIFY_API_PREFIX")
+    if api_prefix:
+        sp.prefix = api_prefix
+    return sp
@@ -0,0 +1,48 @@
+import hashlib
+import json
+import logging
+import os
+
+
+class SyncState:
+    """
+    State of the playlists synced by incremental runs, persisted as JSON between runs.
+
+    Entries are keyed by list file and playlist name and keep a hash of the artist list,
+    the playlist ID and the track URIs added for every artist, so an unchanged playlist
+    can be skipped and a changed one only needs its added and removed artists processed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lists = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as file:
+                    self._lists = json.load(file).get('lists', {})
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable sync state '{path}': {e}")
+
+    @staticmethod
+    def playlist_hash(playlist):
+        content = json.dumps([playlist['playlistName'], playlist['artists']], ensure_ascii=False)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get(self, list_name, playlist_name):
+        return self._lists.get(list_name, {}).get(playlist_name)
+
+    def set(self, list_name, playlist_name, playlist_hash, playlist_id, artist_tracks, synced_at):
+        self._lists.setdefault(list_name, {})[playlist_name] = {
+            'hash': playlist_hash,
+            'playlist_id': playlist_id,
+            'artist_tracks': artist_tracks,
+            'synced_at': synced_at,
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # Write to a temporary file first, so an interrupted run never leaves a truncated state behind
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump({'lists': self._lists}, file, ensure_ascii=False)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+BATCH_SIZE = 100 # Spotify API limit for adding tracks to a playlist
+MAX_WRITE_WORKERS = 4 # Playlists written at the same time
+MAX_WRITE_ATTEMPTS = 4 # Attempts per batch when a write fails without telling whether it was applied
+REPORT_KEYS = ('tracks', 'batches_written', 'checks', 'failed')
+
+
+class PlaylistWriteQueue:
+    """
+    Write-behind queue for adding tracks to playlists.
+
+    add() only buffers the URIs of a playlist and hands every full batch_size batch to a writer
+    thread, so resolution goes on while earlier tracks are written. The batches of one playlist
+    are written one after the other in the order they were added; different playlists are
+    written concurrently. A write that fails without telling whether it was applied (a dropped
+    connection or a 5xx) is only repeated once the playlist's snapshot_id or its last tracks show
+    that it was not, so a retry never adds a batch twice. Once a batch failed, the later batches
+    of its playlist are not written either, so the playlist never has a gap. flush() writes the
+    partial batches, waits for the writes and reports what was written per playlist.
+    """
+
+    def __init__(self, sp, scheduler, max_workers=MAX_WRITE_WORKERS, batch_size=BATCH_SIZE, max_attempts=MAX_WRITE_ATTEMPTS):
+        self.sp = sp
+        self.scheduler = scheduler
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._playlists = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def _state(self, playlist_id, snapshot_id):
+        state = self._playlists.get(playlist_id)
+        if state is None:
+            state = self._playlists[playlist_id] = {
+                'buffer': [],
+                'batches': deque(),
+                'writing': False,
+                'snapshot_id': snapshot_id, # Last known snapshot, None until known
+                'tracks': 0,
+                'batches_written': 0,
+                'checks': 0,
+                'failed': [],
+            }
+        return state
+
+    def _schedule(self, playlist_id, state):
+        # At most one writer per playlist keeps its batches in order
+        if state['batches'] and not state['writing']:
+            state['writing'] = True
+            self._executor.submit(self._drain, playlist_id, state)
+
+    def add(self, playlist_id, uris, snapshot_id=None):
+        """Queue track URIs to be appended to a playlist, snapshot_id is its current snapshot if known."""
+        if not uris:
+            return
+        with self._lock:
+            state = self._state(playlist_id, snapshot_id)
+            state['buffer'].extend(uris)
+            while len(state['buffer']) >= self.batch_size:
+                state['batches'].append(state['buffer'][:self.batch_size])
+                del state['buffer'][:self.batch_size]
+            self._schedule(playlist_id, state)
+
+    def _drain(self, playlist_id, state):
+        while True:
+            with self._lock:
+                if state['failed']:
+                    # Writing on after a failed batch would leave a gap in the playlist, so the later batches fail too
+                    for batch in state['batches']:
+                        state['failed'].extend(batch)
+                    state['batches'].clear()
+                if not state['batches']:
+                    state['writing'] = False
+                    self._idle.notify_all()
+                    return
+                batch = state['batches'].popleft()
+            try:
+                written = self._write(playlist_id, state, batch)
+            except Exception as e:
+                logging.error(f"Adding {len(batch)} tracks to playlist {playlist_id} failed: {e}")
+                written = False
+            with self._lock:
+                if written:
+                    state['tracks'] += len(batch)
+                    state['batches_written'] += 1
+                else:
+                    state['failed'].extend(batch)
+
+    def _write(self, playlist_id, state, batch):
+        """Append one batch, returns whether it is in the playlist."""
+        for attempt in range(self.max_attempts):
+            try:
+                result = self.sp.at_most_once.playlist_add_items(playlist_id, batch)
+            except Exception as e:
+                if not self.scheduler.is_transient(e):
+                    raise
+                logging.warning(f"Adding {len(batch)} tracks to playlist {playlist_id} failed ({e}), checking whether they were added...")
+                state['checks'] += 1
+                applied, state['snapshot_id'] = self._applied(playlist_id, state['snapshot_id'], batch)
+                if applied:
+                    return True
+                if attempt + 1 < self.max_attempts:
+                    time.sleep(self.scheduler.backoff_factor * 2 ** attempt)
+                continue
+            state['snapshot_id'] = result.get('snapshot_id')
+            return True
+        logging.error(f"Giving up adding {len(batch)} tracks to playlist {playlist_id} after {self.max_attempts} attempts.")
+        return False
+
+    def _applied(self, playlist_id, snapshot_id, batch):
+        """
+        Check whether a failed append of batch was applied, returns the answer and the current snapshot_id.
+
+        An unchanged snapshot_id means nothing was written since the last known state; otherwise
+        the batch was applied if it makes up the end of the playlist.
+        """
+        playlist = self.sp.playlist(playlist_id, fields="snapshot_id,tracks(total)")
+        if snapshot_id and playlist['snapshot_id'] == snapshot_id:
+            return False, snapshot_id
+        total = playlist['tracks']['total']
+        if total < len(batch):
+            return False, playlist['snapshot_id']
+        tail = self.sp.playlist_items(playlist_id, fields="items(track(uri))", limit=len(batch), offset=total - len(batch))
+        uris = [item['track']['uri'] if item.get('track') else None for item in tail['items']]
+        return uris == batch, playlist['snapshot_id']
+
+    def flush(self, playlist_ids=None):
+        """
+        Write the partial batches, wait until every queued track is written and return a report.
+
+        Only the given playlists are flushed if playlist_ids is set. The report maps each playlist ID
+        to the number of tracks and batches written, the writes that had to be checked after a
+        failure and the URIs that could not be added; flushed playlists start over afterwards.
+        """
+        with self._lock:
+            playlist_ids = list(self._playlists) if playlist_ids is None else list(dict.fromkeys(playlist_ids))
+            for playlist_id in playlist_ids:
+                state = self._playlists.get(playlist_id)
+                if state and state['buffer']:
+                    state['batches'].append(state['buffer'])
+                    state['buffer'] = []
+                    self._schedule(playlist_id, state)
+            self._idle.wait_for(lambda: not any(
+                self._playlists[playlist_id]['writing'] for playlist_id in playlist_ids if playlist_id in self._playlists
+            ))
+            report = {}
+            for playlist_id in playlist_ids:
+                state = self._playlists.pop(playlist_id, None)
+                report[playlist_id] = {key: state[key] for key in REPORT_KEYS} if state else {'tracks': 0, 'batches_written': 0, 'checks': 0, 'failed': []}
+
+        tracks = sum(entry['tracks'] for entry in report.values())
+        if tracks or any(entry['failed'] for entry in report.values()):
+            batches = sum(entry['batches_written'] for entry in report.values())
+            checks = sum(entry['checks'] for entry in report.values())
+            failed = sum(len(entry['failed']) for entry in report.values())
+            logging.info(f"Wrote {tracks} tracks to {len(report)} playlists in {batches} batches ({checks} failed writes checked, {failed} tracks not added).")
+        return report
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown()
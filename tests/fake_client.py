@@ -0,0 +1,67 @@
+class FakeSpotifyError(Exception):
+    """Error carrying an HTTP status like spotipy.SpotifyException."""
+
+    def __init__(self, http_status, retry_after=None):
+        super().__init__(f"http status {http_status}")
+        self.http_status = http_status
+        self.headers = {} if retry_after is None else {'Retry-After': str(retry_after)}
+
+
+class FakePlaylistClient:
+    """
+    In-memory stand-in for the playlist endpoints of a single playlist.
+
+    failures lists what happens to the next writes in order: 'before' raises a 502 without
+    applying the write, 'after' applies it and then raises a 502 like a lost response, 429
+    rejects it with a Retry-After of retry_after seconds, None lets the write succeed.
+    """
+
+    def __init__(self, uris=(), failures=(), retry_after=0):
+        self.uris = list(uris)
+        self.failures = list(failures)
+        self.retry_after = retry_after
+        self.version = 0
+        self.writes = 0
+
+    @property
+    def at_most_once(self):
+        return self
+
+    @property
+    def snapshot_id(self):
+        return f"snapshot-{self.version}"
+
+    def _write(self, apply):
+        self.writes += 1
+        failure = self.failures.pop(0) if self.failures else None
+        if failure == 429:
+            raise FakeSpotifyError(429, self.retry_after)
+        if failure == 'before':
+            raise FakeSpotifyError(502)
+        apply()
+        self.version += 1
+        if failure == 'after':
+            raise FakeSpotifyError(502)
+        return {'snapshot_id': self.snapshot_id}
+
+    def playlist(self, playlist_id, fields=None):
+        return {'snapshot_id': self.snapshot_id, 'tracks': {'total': len(self.uris)}}
+
+    def playlist_items(self, playlist_id, fields=None, limit=100, offset=0):
+        return {'items': [{'track': {'uri': uri}} for uri in self.uris[offset:offset + limit]]}
+
+    def playlist_add_items(self, playlist_id, items, position=None):
+        def apply():
+            at = len(self.uris) if position is None else position
+            self.uris[at:at] = items
+        return self._write(apply)
+
+    def playlist_remove_specific_occurrences_of_items(self, playlist_id, items, snapshot_id=None):
+        positions = {position for item in items for position in item['positions']}
+        return self._write(lambda: setattr(self, 'uris', [uri for position, uri in enumerate(self.uris) if position not in positions]))
+
+    def playlist_reorder_items(self, playlist_id, range_start, insert_before, snapshot_id=None):
+        def apply():
+            uri = self.uris.pop(range_start)
+            self.uris.insert(insert_before - 1 if insert_before > range_start else insert_before, uri)
+        return self._write(apply)
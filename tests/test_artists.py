@@ -0,0 +1,18 @@
+import os
+
+from playlist_creator.artists import ArtistPlaylistUpdater
+from playlist_creator.settings import ArtistSettings
+
+
+def test_list_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lists").mkdir()
+    (tmp_path / "lists" / "fest.json").write_text("{}")
+    (tmp_path / "other.json").write_text("{}")
+    (tmp_path / "fest.json").write_text("{}")
+    updater = ArtistPlaylistUpdater(context=None, settings=ArtistSettings(lists_dir="lists"))
+    assert updater.list_path("fest.json") == os.path.join("lists", "fest.json")
+    assert updater.list_path(os.path.join("lists", "fest.json")) == os.path.join("lists", "fest.json")
+    assert updater.list_path("other.json") == "other.json"
+    assert updater.list_path("missing.json") == os.path.join("lists", "missing.json")
+    assert updater.list_path(str(tmp_path / "other.json")) == str(tmp_path / "other.json")
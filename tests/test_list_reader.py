@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from playlist_creator.list_reader import iter_playlists
+
+
+def write_lines(path, entries):
+    path.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+    return str(path)
+
+
+def test_grouped_artist_lines_form_one_playlist(tmp_path):
+    path = write_lines(tmp_path / "list.jsonl", [
+        {'playlistName': 'Fest A', 'artist': 'Alpha'},
+        {'playlistName': 'Fest A', 'artist': 'Gamma'},
+        {'playlistName': 'Fest B', 'artists': ['Beta']},
+    ])
+    assert list(iter_playlists(path)) == [
+        {'playlistName': 'Fest A', 'artists': ['Alpha', 'Gamma']},
+        {'playlistName': 'Fest B', 'artists': ['Beta']},
+    ]
+
+
+def test_interleaved_playlist_lines_are_rejected(tmp_path):
+    path = write_lines(tmp_path / "list.ndjson", [
+        {'playlistName': 'Fest A', 'artist': 'Alpha'},
+        {'playlistName': 'Fest B', 'artist': 'Beta'},
+        {'playlistName': 'Fest A', 'artist': 'Gamma'},
+    ])
+    with pytest.raises(ValueError, match="'Fest A' is listed again on line 3"):
+        list(iter_playlists(path))
@@ -0,0 +1,25 @@
+import json
+
+from playlist_creator.playlist_index import UserPlaylistIndex
+
+
+class PlaylistListClient:
+    def __init__(self, playlists):
+        self.playlists = playlists
+        self.fetches = 0
+
+    def current_user_playlists(self, limit=50):
+        self.fetches += 1
+        return {'items': [{'id': playlist_id, 'name': name} for name, playlist_id in self.playlists.items()], 'next': None}
+
+
+def test_persisted_entries_of_renamed_or_deleted_playlists_are_not_used(tmp_path):
+    cache_path = tmp_path / "index.json"
+    cache_path.write_text(json.dumps({'fest a': 'deleted', 'fest b': 'renamed'}))
+    client = PlaylistListClient({'Fest B (old)': 'renamed', 'Fest C': 'kept'})
+    index = UserPlaylistIndex(client, str(cache_path))
+    assert index.get('Fest A') is None
+    assert index.get('Fest B') is None
+    assert index.get('fest c') == 'kept'
+    assert client.fetches == 1
+    assert json.loads(cache_path.read_text()) == {'fest b (old)': 'renamed', 'fest c': 'kept'}
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from playlist_creator.playlist_sync import BATCH_SIZE, MAX_WRITE_ATTEMPTS, apply_playlist_diff, diff_playlist, longest_increasing_subsequence
+from playlist_creator.request_scheduler import RequestScheduler
+
+from .fake_client import FakePlaylistClient, FakeSpotifyError
+
+
+def apply_locally(current, removals, moves, additions):
+    """Apply the writes of diff_playlist to a list, with the semantics of the Spotify endpoints."""
+    uris = list(current)
+    for uri, position in removals:
+        assert uris[position] == uri
+        del uris[position]
+    for range_start, insert_before in moves:
+        uri = uris.pop(range_start)
+        uris.insert(insert_before - 1 if insert_before > range_start else insert_before, uri)
+    for position, batch in additions:
+        uris[position:position] = batch
+    return uris
+
+
+def random_lists(rng):
+    pool = [f"spotify:track:{n}" for n in range(rng.randint(1, 40))]
+    current = [rng.choice(pool) for _ in range(rng.randint(0, 30))]
+    desired = [rng.choice(pool) for _ in range(rng.randint(0, 30))]
+    return current, desired
+
+
+def test_diff_round_trips_to_deduplicated_desired():
+    rng = random.Random(0)
+    for _ in range(5000):
+        current, desired = random_lists(rng)
+        removals, moves, additions = diff_playlist(current, desired)
+        assert apply_locally(current, removals, moves, additions) == list(dict.fromkeys(desired))
+        assert [position for _, position in removals] == sorted((position for _, position in removals), reverse=True)
+
+
+def test_diff_keeps_unchanged_playlist_and_splits_large_additions():
+    uris = [f"spotify:track:{n}" for n in range(250)]
+    assert diff_playlist(uris, uris) == ([], [], [])
+    removals, moves, additions = diff_playlist([], uris)
+    assert not removals and not moves
+    assert [len(batch) for _, batch in additions] == [BATCH_SIZE, BATCH_SIZE, 50]
+
+
+def test_diff_moves_a_single_reordered_track():
+    current = ["a", "b", "c", "d"]
+    removals, moves, additions = diff_playlist(current, ["a", "c", "d", "b"])
+    assert not removals and not additions and len(moves) == 1
+
+
+def test_longest_increasing_subsequence():
+    values = [3, 1, 4, 1, 5, 9, 2, 6]
+    indices = sorted(longest_increasing_subsequence(values))
+    assert len(indices) == 4
+    assert all(values[i] < values[j] for i, j in zip(indices, indices[1:]))
+    assert longest_increasing_subsequence([]) == set()
+
+
+def apply_with_client(client, current, desired):
+    scheduler = RequestScheduler(initial_rate=1000, burst=100, backoff_factor=0)
+    removals, moves, additions = diff_playlist(current, desired)
+    apply_playlist_diff(client, scheduler, 'playlist', client.snapshot_id, removals, moves, additions)
+    return client.uris
+
+
+def test_lost_response_of_an_addition_is_not_repeated():
+    current = ["a", "b", "c"]
+    client = FakePlaylistClient(current, failures=['after'])
+    assert apply_with_client(client, current, ["a", "x", "y", "b", "c"]) == ["a", "x", "y", "b", "c"]
+    assert client.writes == 1
+
+
+def test_failed_writes_that_were_not_applied_are_repeated():
+    current = ["a", "b", "c", "d"]
+    client = FakePlaylistClient(current, failures=['before', 'before', 'before'])
+    assert apply_with_client(client, current, ["d", "a", "c", "x"]) == ["d", "a", "c", "x"]
+
+
+def test_lost_responses_of_every_kind_of_write_are_not_repeated():
+    rng = random.Random(1)
+    for _ in range(300):
+        current, desired = random_lists(rng)
+        current = list(dict.fromkeys(current))
+        # At most two failures in a row, so every write succeeds within its attempts
+        client = FakePlaylistClient(current, failures=[rng.choice([None, 'before', 'after']) if n % 3 else None for n in range(200)])
+        assert apply_with_client(client, current, desired) == list(dict.fromkeys(desired))
+
+
+def test_write_that_keeps_failing_is_raised():
+    client = FakePlaylistClient(["a"], failures=['before'] * MAX_WRITE_ATTEMPTS)
+    with pytest.raises(FakeSpotifyError):
+        apply_with_client(client, ["a"], ["a", "b"])
+    assert client.uris == ["a"]
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from playlist_creator.request_scheduler import RequestScheduler, ScheduledClient
+
+from .fake_client import FakePlaylistClient, FakeSpotifyError
+
+
+def scheduled(client, idempotent_methods=(), **options):
+    scheduler = RequestScheduler(**dict({'initial_rate': 1000, 'burst': 100, 'backoff_factor': 0}, **options))
+    return ScheduledClient(client, scheduler, idempotent_methods), scheduler
+
+
+def test_rate_limited_call_waits_for_retry_after():
+    client = FakePlaylistClient(failures=[429], retry_after=0.3)
+    sp, scheduler = scheduled(client)
+    start = time.monotonic()
+    sp.playlist_add_items('playlist', ["a"])
+    assert time.monotonic() - start >= 0.3
+    assert client.uris == ["a"] and client.writes == 2
+    assert scheduler.throttled == 1 and scheduler.retries == 1
+
+
+def test_rate_limit_halves_the_rate_and_probes_back_up():
+    client = FakePlaylistClient(failures=[429])
+    sp, scheduler = scheduled(client, initial_rate=100, burst=1, rate_step=5)
+    sp.playlist_add_items('playlist', ["a"])
+    # Halved by the 429, then raised one step by the retry that had to wait for a token
+    assert scheduler.throttled == 1 and scheduler.rate == 100 / 2 + 5
+    for _ in range(4):
+        sp.playlist_add_items('playlist', ["b"])
+    assert scheduler.rate == 100 / 2 + 5 * 5
+
+
+def test_rate_never_exceeds_max_rate():
+    sp, scheduler = scheduled(FakePlaylistClient(), initial_rate=20, max_rate=22, burst=1, rate_step=5)
+    for _ in range(5):
+        sp.playlist_add_items('playlist', ["a"])
+    assert scheduler.rate == 22
+
+
+def test_idempotent_call_is_retried_on_transient_error():
+    client = FakePlaylistClient(failures=['before', 'before'])
+    sp, scheduler = scheduled(client, idempotent_methods={'playlist_add_items'})
+    sp.playlist_add_items('playlist', ["a"])
+    assert client.uris == ["a"] and client.writes == 3
+    assert scheduler.retries == 2
+
+
+def test_other_calls_are_sent_at_most_once_on_transient_error():
+    client = FakePlaylistClient(failures=['after'])
+    sp, scheduler = scheduled(client)
+    with pytest.raises(FakeSpotifyError):
+        sp.playlist_add_items('playlist', ["a"])
+    assert client.uris == ["a"] and client.writes == 1
+
+
+def test_at_most_once_overrides_idempotent_methods_but_retries_rate_limits():
+    client = FakePlaylistClient(failures=[429, 'after'])
+    sp, scheduler = scheduled(client, idempotent_methods={'playlist_add_items'})
+    with pytest.raises(FakeSpotifyError):
+        sp.at_most_once.playlist_add_items('playlist', ["a"])
+    assert client.uris == ["a"] and client.writes == 2
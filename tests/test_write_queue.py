@@ -0,0 +1,62 @@
+from playlist_creator.request_scheduler import RequestScheduler
+from playlist_creator.write_queue import PlaylistWriteQueue
+
+from .fake_client import FakePlaylistClient, FakeSpotifyError
+
+URIS = [f"spotify:track:{n}" for n in range(250)]
+
+
+def write(client, uris, snapshot_id=None, batch_size=100):
+    queue = PlaylistWriteQueue(client, RequestScheduler(initial_rate=1000, burst=100, backoff_factor=0), batch_size=batch_size)
+    try:
+        queue.add('playlist', uris, snapshot_id)
+        return queue.flush()['playlist']
+    finally:
+        queue.close()
+
+
+def test_batches_are_written_in_order():
+    client = FakePlaylistClient()
+    report = write(client, URIS, client.snapshot_id)
+    assert client.uris == URIS
+    assert report['tracks'] == len(URIS) and report['batches_written'] == 3 and report['failed'] == []
+
+
+def test_applied_batch_with_lost_response_is_not_added_twice():
+    client = FakePlaylistClient(failures=[None, 'after', None])
+    report = write(client, URIS, client.snapshot_id)
+    assert client.uris == URIS
+    assert client.writes == 3
+    assert report['checks'] == 1 and report['batches_written'] == 3
+
+
+def test_lost_response_without_known_snapshot_is_checked_by_the_tail():
+    client = FakePlaylistClient(["spotify:track:existing"], failures=['after'])
+    report = write(client, URIS[:100])
+    assert client.uris == ["spotify:track:existing"] + URIS[:100]
+    assert report['checks'] == 1 and report['failed'] == []
+
+
+def test_batch_that_was_not_applied_is_repeated():
+    client = FakePlaylistClient(failures=['before', 'before', None, 'after'])
+    report = write(client, URIS, client.snapshot_id)
+    assert client.uris == URIS
+    assert report['checks'] == 3 and report['failed'] == []
+
+
+def test_batch_that_keeps_failing_is_reported_with_the_later_batches():
+    client = FakePlaylistClient(failures=[None] + ['before'] * 4)
+    report = write(client, URIS, client.snapshot_id)
+    assert client.uris == URIS[:100]
+    assert client.writes == 5
+    assert report['tracks'] == 100 and report['failed'] == URIS[100:]
+
+
+def test_permanent_error_is_not_retried():
+    class ForbiddenClient(FakePlaylistClient):
+        def playlist_add_items(self, playlist_id, items, position=None):
+            raise FakeSpotifyError(403)
+
+    client = ForbiddenClient()
+    report = write(client, URIS[:10])
+    assert report['failed'] == URIS[:10] and report['checks'] == 0
@@ -0,0 +1,7 @@
+import sys
+
+from playlist_creator.cli import main
+
+# Same as: python -m playlist_creator watch [options], every list is updated in this process with one client
+if __name__ == "__main__":
+    sys.exit(main(['watch', *sys.argv[1:]]))